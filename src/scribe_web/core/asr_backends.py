@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+FALLBACK_ORDER = ("faster-whisper", "whisper", "vosk")
+
+
+def _model_input(audio: Path | Any) -> Any:
+    # Ścieżkę dekoduje ffmpeg; tablicę float32 16 kHz model bierze bezpośrednio.
+    return str(audio) if isinstance(audio, Path) else audio
+
+
+class AsrBackend(ABC):
+    """Brak którejś metody wychodzi przy rejestracji w BACKENDS, nie w trakcie transkrypcji."""
+
+    name = ""
+    module = ""
+
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.module) is not None
+
+    @abstractmethod
+    def load(self, settings: dict) -> Any: ...
+
+    @abstractmethod
+    def transcribe(self, model: Any, audio: Path | Any, language: str, settings: dict) -> str: ...
+
+    @abstractmethod
+    def transcribe_segments(
+        self, model: Any, audio: Path | Any, language: str, settings: dict
+    ) -> list[dict]:
+        """Odcinki {"start", "end", "text"} z czasami w sekundach od początku `audio`."""
+
+
+class WhisperBackend(AsrBackend):
+    name = "whisper"
+    module = "whisper"
+
+    def load(self, settings: dict) -> Any:
+        import whisper
+
+        return whisper.load_model(settings["model"], device=settings["device"])
+
+    def _run(self, model: Any, audio: Path | Any, language: str, settings: dict) -> dict:
+        return model.transcribe(
+            _model_input(audio),
+            language=language,
+            fp16=settings["compute_type"] == "float16",
+        )
+
+    def transcribe(self, model: Any, audio: Path | Any, language: str, settings: dict) -> str:
+        result = self._run(model, audio, language, settings)
+        return (result.get("text") or "").strip()
+
+    def transcribe_segments(
+        self, model: Any, audio: Path | Any, language: str, settings: dict
+    ) -> list[dict]:
+        result = self._run(model, audio, language, settings)
+        return [
+            {"start": float(seg["start"]), "end": float(seg["end"]), "text": seg["text"].strip()}
+            for seg in result.get("segments") or []
+        ]
+
+
+class FasterWhisperBackend(AsrBackend):
+    name = "faster-whisper"
+    module = "faster_whisper"
+
+    def load(self, settings: dict) -> Any:
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            settings["model"],
+            device=settings["device"],
+            compute_type=settings["compute_type"],
+        )
+
+    def transcribe(self, model: Any, audio: Path | Any, language: str, settings: dict) -> str:
+        segments, _info = model.transcribe(_model_input(audio), language=language)
+        return "".join(segment.text for segment in segments).strip()
+
+    def transcribe_segments(
+        self, model: Any, audio: Path | Any, language: str, settings: dict
+    ) -> list[dict]:
+        segments, _info = model.transcribe(_model_input(audio), language=language)
+        return [
+            {"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()}
+            for seg in segments
+        ]
+
+
+class VoskBackend(AsrBackend):
+    name = "vosk"
+    module = "vosk"
+
+    def load(self, settings: dict) -> Any:
+        import vosk
+
+        vosk.SetLogLevel(-1)
+        model_path = settings.get("vosk_model_path")
+        if model_path:
+            return vosk.Model(str(model_path))
+        return vosk.Model(lang=settings.get("language", "pl"))
+
+    def _results(self, model: Any, audio: Path | Any, words: bool) -> list[dict]:
+        import vosk
+
+        from scribe_web.core.pcm import SAMPLE_RATE, read_pcm16, to_pcm16
+
+        if isinstance(audio, Path):
+            samples, samplerate = read_pcm16(audio)
+        else:
+            samples, samplerate = to_pcm16(audio), SAMPLE_RATE
+        recognizer = vosk.KaldiRecognizer(model, samplerate)
+        recognizer.SetWords(words)
+        pcm = samples.tobytes()
+        chunk = 8000 * 2
+        results = []
+        for start in range(0, len(pcm), chunk):
+            if recognizer.AcceptWaveform(pcm[start : start + chunk]):
+                results.append(json.loads(recognizer.Result()))
+        results.append(json.loads(recognizer.FinalResult()))
+        return results
+
+    def transcribe(self, model: Any, audio: Path | Any, language: str, settings: dict) -> str:
+        texts = [result.get("text") or "" for result in self._results(model, audio, False)]
+        return " ".join(text for text in texts if text).strip()
+
+    def transcribe_segments(
+        self, model: Any, audio: Path | Any, language: str, settings: dict
+    ) -> list[dict]:
+        segments = []
+        for result in self._results(model, audio, True):
+            words = result.get("result") or []
+            if words and result.get("text"):
+                segments.append(
+                    {"start": words[0]["start"], "end": words[-1]["end"], "text": result["text"]}
+                )
+        return segments
+
+
+BACKENDS: dict[str, AsrBackend] = {
+    backend.name: backend
+    for backend in (WhisperBackend(), FasterWhisperBackend(), VoskBackend())
+}
+
+
+def resolve_backend(preferred: str | list[str] | None) -> AsrBackend | None:
+    if preferred in (None, "", "auto"):
+        names: list[str] = []
+    elif isinstance(preferred, str):
+        names = [preferred]
+    else:
+        names = list(preferred)
+    for name in [*names, *FALLBACK_ORDER]:
+        backend = BACKENDS.get(name)
+        if backend is not None and backend.available():
+            return backend
+    return None
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from scribe_web.core.asr_backends import AsrBackend, resolve_backend
+
+DEFAULT_ASR = {
+    "backend": "whisper",
+    "model": "base",
+    "device": "cpu",
+    "compute_type": "int8",
+    "language": "pl",
+    "vosk_model_path": "",
+    "warmup": True,
+    "idle_unload_s": 600,
+}
+
+
+def current_rss_mb() -> float | None:
+    try:
+        import psutil
+    except ModuleNotFoundError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        import resource
+    except ModuleNotFoundError:
+        return None
+    import sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KiB, macOS bajty; to szczyt procesu, nie bieżące RSS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _fmt_mb(value: float | None) -> str:
+    return f"{value:.0f}" if value is not None else "?"
+
+
+class ModelRegistry:
+    """Jeden współdzielony model ASR na proces: ładowany raz, zwalniany po bezczynności."""
+
+    def __init__(self) -> None:
+        self.settings = dict(DEFAULT_ASR)
+        self.backend: AsrBackend | None = None
+        self._resolved = False
+        self.logger = logging.getLogger("scribe_web")
+        self.load_seconds: float | None = None
+        self._model: Any = None
+        self._key: tuple | None = None
+        self._lock = threading.RLock()
+        self._infer_lock = threading.Lock()
+        self._users = 0
+        self._idle_timer: threading.Timer | None = None
+
+    def configure(self, config: dict) -> None:
+        settings = dict(DEFAULT_ASR)
+        settings.update(config.get("asr", {}))
+        with self._lock:
+            self.settings = settings
+            self._resolved = False
+            if self._key is not None and self._key != self._settings_key():
+                self._unload_locked()
+
+    def _resolve(self) -> AsrBackend | None:
+        if not self._resolved:
+            self.backend = resolve_backend(self.settings.get("backend"))
+            self._resolved = True
+        return self.backend
+
+    def available(self) -> bool:
+        with self._lock:
+            return self._resolve() is not None
+
+    def model_key(self) -> str:
+        with self._lock:
+            return ":".join([*self._settings_key(), self.settings["language"]])
+
+    def _settings_key(self) -> tuple:
+        backend = self._resolve()
+        return (
+            backend.name if backend else "",
+            self.settings["model"],
+            self.settings["device"],
+            self.settings["compute_type"],
+        )
+
+    def _load(self) -> Any:
+        backend = self._resolve()
+        if backend is None:
+            raise ModuleNotFoundError("No ASR backend installed (whisper/faster-whisper/vosk)")
+        rss_before = current_rss_mb()
+        t0 = time.perf_counter()
+        model = backend.load(self.settings)
+        self.load_seconds = time.perf_counter() - t0
+        rss_after = current_rss_mb()
+        self.logger.info(
+            "ASR model loaded: backend=%s model=%s device=%s seconds=%.2f rss_mb=%s->%s",
+            backend.name,
+            self.settings["model"],
+            self.settings["device"],
+            self.load_seconds,
+            _fmt_mb(rss_before),
+            _fmt_mb(rss_after),
+        )
+        return model
+
+    def get(self) -> Any:
+        with self._lock:
+            if self._model is None or self._key != self._settings_key():
+                self._model = self._load()
+                self._key = self._settings_key()
+            return self._model
+
+    @contextmanager
+    def use(self) -> Iterator[Any]:
+        with self._lock:
+            self._cancel_idle_timer()
+            self._users += 1
+        try:
+            yield self.get()
+        finally:
+            with self._lock:
+                self._users -= 1
+                if self._users == 0:
+                    self._schedule_idle_unload()
+
+    def transcribe(self, audio: Path | Any) -> str:
+        """`audio`: ścieżka do pliku albo tablica float32 16 kHz mono."""
+        with self.use() as model, self._infer_lock:
+            # Kolejka i transkrypcja strumieniowa dzielą model; inferencja idzie po jednej.
+            return self.backend.transcribe(model, audio, self.settings["language"], self.settings)
+
+    def transcribe_segments(self, audio: Path | Any) -> list[dict]:
+        with self.use() as model, self._infer_lock:
+            return self.backend.transcribe_segments(
+                model, audio, self.settings["language"], self.settings
+            )
+
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def warm_up_async(self) -> threading.Thread | None:
+        if not self.settings.get("warmup", True) or self.is_loaded() or not self.available():
+            return None
+
+        def run() -> None:
+            try:
+                with self.use():
+                    pass
+            except ModuleNotFoundError:
+                pass
+            except Exception as exc:
+                self.logger.error("ASR warm-up failed: %s", exc)
+
+        thread = threading.Thread(target=run, name="scribe-asr-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self) -> None:
+        with self._lock:
+            self._cancel_idle_timer()
+            self._unload_locked()
+
+    def _unload_locked(self) -> None:
+        if self._model is None:
+            return
+        self._model = None
+        self._key = None
+        self.logger.info("ASR model unloaded: rss_mb=%s", _fmt_mb(current_rss_mb()))
+
+    def _cancel_idle_timer(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _schedule_idle_unload(self) -> None:
+        idle_s = float(self.settings.get("idle_unload_s") or 0)
+        if idle_s <= 0:
+            return
+        self._cancel_idle_timer()
+        self._idle_timer = threading.Timer(idle_s, self._idle_unload)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _idle_unload(self) -> None:
+        with self._lock:
+            if self._users == 0:
+                self._unload_locked()
+                self._idle_timer = None
+
+
+MODELS = ModelRegistry()
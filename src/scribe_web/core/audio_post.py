@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+STORAGE_FORMATS = {
+    "flac": ("FLAC", "PCM_16", ".flac"),
+    "opus": ("OGG", "OPUS", ".ogg"),
+}
+
+
+def time_map_path(in_wav: Path) -> Path:
+    return in_wav.with_name(f"{in_wav.stem}_vad.json")
+
+
+def trim_silence(audio: Any, samplerate: int, vad: dict, in_wav: Path) -> tuple[Any, list[dict]]:
+    """Wycina ciszę z nagrania w pamięci i zapisuje mapę czasu obok `in_wav`."""
+    from scribe_web.core.vad import compress_silence
+
+    compact, segments = compress_silence(audio, samplerate, vad)
+    time_map = {
+        "source": in_wav.name,
+        "samplerate": samplerate,
+        "source_s": round(len(audio) / samplerate, 3) if samplerate else 0,
+        "speech_s": round(len(compact) / samplerate, 3) if samplerate else 0,
+        "segments": segments,
+    }
+    map_path = time_map_path(in_wav)
+    tmp_map = map_path.with_suffix(".json.tmp")
+    tmp_map.write_text(json.dumps(time_map, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_map.replace(map_path)
+    return compact, segments
+
+
+def trim_silence_wav(in_wav: Path, vad: dict) -> tuple[Path | None, list[dict]]:
+    import soundfile as sf
+
+    audio, samplerate = sf.read(str(in_wav), dtype="float32", always_2d=True)
+    compact, segments = trim_silence(audio, samplerate, vad, in_wav)
+    if not segments:
+        return None, segments
+    fd, tmp_name = tempfile.mkstemp(prefix="scribe_vad_", suffix=".wav")
+    os.close(fd)
+    out = Path(tmp_name)
+    sf.write(str(out), compact, samplerate)
+    return out, segments
+
+
+def stored_audio_path(in_wav: Path, fmt: str) -> Path:
+    """Ścieżka, pod którą `compress_audio` zostawi nagranie."""
+    if fmt not in STORAGE_FORMATS:
+        return in_wav
+    return in_wav.with_suffix(STORAGE_FORMATS[fmt][2])
+
+
+def compress_audio(in_wav: Path, fmt: str) -> Path:
+    if fmt not in STORAGE_FORMATS:
+        return in_wav
+    import soundfile as sf
+
+    container, subtype, _suffix = STORAGE_FORMATS[fmt]
+    audio, samplerate = sf.read(str(in_wav), dtype="float32", always_2d=True)
+    out = stored_audio_path(in_wav, fmt)
+    tmp = out.with_name(f".{out.name}.part")
+    sf.write(str(tmp), audio, samplerate, format=container, subtype=subtype)
+    tmp.replace(out)
+    in_wav.unlink()
+    return out
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from scribe_web.core.paths import sessions_root
+
+BLOBS_DIRNAME = "_blobs"
+_CHUNK = 1024 * 1024
+
+
+def blobs_root(config: dict) -> Path:
+    return sessions_root(config) / BLOBS_DIRNAME
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def blob_path(root: Path, digest: str, suffix: str) -> Path:
+    return root / digest[:2] / f"{digest}{suffix.lower()}"
+
+
+def _replace_with_link(src: Path, dest: Path) -> None:
+    tmp = dest.with_name(f".{dest.name}.lnk")
+    if tmp.exists():
+        tmp.unlink()
+    os.link(src, tmp)
+    tmp.replace(dest)
+
+
+def store_file(root: Path, path: Path) -> str | None:
+    """Wkłada plik do magazynu blobów i podmienia go na hardlink. None = FS bez hardlinków."""
+    digest = file_digest(path)
+    blob = blob_path(root, digest, path.suffix)
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if blob.exists():
+            if not blob.samefile(path):
+                _replace_with_link(blob, path)
+        else:
+            os.link(path, blob)
+    except OSError:
+        return None
+    return digest
+
+
+def link_copy(src: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        _replace_with_link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def detach(path: Path) -> None:
+    # Zapis "w miejscu" do pliku-hardlinku zmieniłby blob i wszystkie sesje, które go dzielą.
+    try:
+        if path.stat().st_nlink > 1:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def collect_garbage(root: Path) -> dict:
+    removed = 0
+    freed = 0
+    if not root.exists():
+        return {"removed": 0, "freed_bytes": 0}
+    for blob in root.glob("*/*"):
+        try:
+            st = blob.stat()
+        except FileNotFoundError:
+            continue
+        # Licznik hardlinków to licznik referencji: 1 = żadna sesja już nie wskazuje na blob.
+        if st.st_nlink > 1:
+            continue
+        blob.unlink()
+        removed += 1
+        freed += st.st_size
+    for shard in root.iterdir():
+        if shard.is_dir() and not any(shard.iterdir()):
+            shard.rmdir()
+    return {"removed": removed, "freed_bytes": freed}
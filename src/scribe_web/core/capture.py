@@ -1,16 +1,128 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Any
 
 from mss import mss
+from mss.exception import ScreenShotError
 from PIL import Image
 
+from scribe_web.core.encoders import resolve_profile, save_image
+from scribe_web.core.windows import cursor_position, window_rect_at
 
-def capture_fullscreen_png(out_path: Path) -> None:
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+def _primary_monitor(sct: Any) -> dict:
+    monitor_index = 1 if len(sct.monitors) > 1 else 0
+    return sct.monitors[monitor_index]
+
+
+def _clip(rect: dict, bounds: dict) -> dict | None:
+    left = max(int(rect["left"]), bounds["left"])
+    top = max(int(rect["top"]), bounds["top"])
+    right = min(int(rect["left"]) + int(rect["width"]), bounds["left"] + bounds["width"])
+    bottom = min(int(rect["top"]) + int(rect["height"]), bounds["top"] + bounds["height"])
+    if right <= left or bottom <= top:
+        return None
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+def _monitor_at(sct: Any, x: int, y: int) -> dict | None:
+    for monitor in sct.monitors[1:]:
+        if (
+            monitor["left"] <= x < monitor["left"] + monitor["width"]
+            and monitor["top"] <= y < monitor["top"] + monitor["height"]
+        ):
+            return monitor
+    return None
+
+
+def capture_rect(sct: Any, mode: str, region: dict | None = None) -> dict:
+    primary = _primary_monitor(sct)
+    everything = sct.monitors[0]
+    if mode == "all":
+        return everything
+    if mode == "region" and region:
+        return _clip(region, everything) or primary
+    if mode == "window":
+        pos = cursor_position()
+        if pos is None:
+            return primary
+        rect = window_rect_at(*pos)
+        if rect is not None:
+            return _clip(rect, everything) or primary
+        return _monitor_at(sct, *pos) or primary
+    return primary
+
+
+def rect_of(screenshot: Any) -> dict:
+    return {
+        "left": screenshot.left,
+        "top": screenshot.top,
+        "width": screenshot.width,
+        "height": screenshot.height,
+    }
+
+
+def grab_primary() -> Any:
     with mss() as sct:
-        monitor_index = 1 if len(sct.monitors) > 1 else 0
-        monitor = sct.monitors[monitor_index]
-        screenshot = sct.grab(monitor)
-        image = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
-        image.save(out_path, format="PNG")
+        return sct.grab(_primary_monitor(sct))
+
+
+class ScreenGrabber:
+    """Długo żyjące połączenie mss: bez ponownego otwierania backendu przy każdym K."""
+
+    def __init__(self) -> None:
+        self._sct: Any = None
+        self._monitor: dict | None = None
+
+    def open(self) -> None:
+        if self._sct is None:
+            self._sct = mss()
+            self._monitor = _primary_monitor(self._sct)
+
+    def refresh_monitors(self) -> None:
+        self.close()
+        self.open()
+
+    def grab(self, mode: str = "full", region: dict | None = None) -> Any:
+        self.open()
+        try:
+            return self._sct.grab(self._rect(mode, region))
+        except ScreenShotError:
+            # Zmiana ekranów (odłączony monitor, nowa rozdzielczość) - jedna próba po odświeżeniu.
+            self.refresh_monitors()
+            return self._sct.grab(self._rect(mode, region))
+
+    def _rect(self, mode: str, region: dict | None) -> dict:
+        if mode == "full":
+            return self._monitor
+        return capture_rect(self._sct, mode, region)
+
+    def close(self) -> None:
+        if self._sct is not None:
+            self._sct.close()
+        self._sct = None
+        self._monitor = None
+
+
+def screenshot_to_image(screenshot: Any) -> Image.Image:
+    # Dekoder "raw" (BGRX) przepakowuje bufor BGRA z mss prosto do RGB: jedna kopia,
+    # bez pośredniego obrazu RGBA i konwersji.
+    return Image.frombuffer("RGB", screenshot.size, screenshot.raw, "raw", "BGRX", 0, 1)
+
+
+def encode_screenshot(
+    screenshot: Any,
+    out_path: Path,
+    profile: dict,
+    ai_copy_path: Path | None = None,
+    ai_profile: dict | None = None,
+) -> None:
+    image = screenshot_to_image(screenshot)
+    save_image(image, out_path, profile)
+    if ai_copy_path is not None and ai_profile is not None:
+        save_image(image, ai_copy_path, ai_profile)
+
+
+def capture_fullscreen_png(out_path: Path) -> None:
+    encode_screenshot(grab_primary(), out_path, resolve_profile(None))
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+_STOP = object()
+
+
+class CaptureWorker:
+    def __init__(self, max_pending: int = 4, logger: logging.Logger | None = None) -> None:
+        self.logger = logger or logging.getLogger("scribe_web")
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._run, name="scribe-capture", daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if self._closed:
+            raise RuntimeError("CaptureWorker is closed")
+        future: Future = Future()
+        # Pełna kolejka blokuje K (backpressure) zamiast trzymać w RAM dowolnie wiele klatek.
+        self._queue.put((future, fn, args))
+        return future
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                future, fn, args = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as exc:
+                    self.logger.error("CAPTURE write failed: %s", exc)
+                    future.set_exception(exc)
+            finally:
+                self._queue.task_done()
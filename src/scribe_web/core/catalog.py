@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from scribe_web.core.constants import JOURNAL_FILENAME, PAYLOAD_FILENAME
+from scribe_web.core.transcript_cache import CACHE_DIRNAME
+
+CATALOG_FILENAME = "catalog.sqlite3"
+# Podbić przy zmianie tego, co index_session zapisuje: refresh przeindeksuje wtedy wszystko.
+CATALOG_VERSION = 2
+
+# Ścieżki, których mtime zmienia się przy każdej zmianie sesji (nowy plik, kompakcja, dziennik).
+SIGNATURE_PATHS = ("", PAYLOAD_FILENAME, JOURNAL_FILENAME, "steps", "transcripts", "notes")
+
+COLUMNS = (
+    "name",
+    "project",
+    "created_at",
+    "step_count",
+    "payload_bytes",
+    "total_bytes",
+    "has_voice",
+    "last_modified",
+)
+
+SEARCH_LIMIT = 20
+
+# Treść kroków do wyszukiwania; steps_fts (FTS5) to indeks nad nią (external content).
+SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS steps_fts USING fts5("
+    "title, url, notes, transcript, content='step_docs', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS step_docs_ai AFTER INSERT ON step_docs BEGIN "
+    "INSERT INTO steps_fts(rowid, title, url, notes, transcript) "
+    "VALUES (new.id, new.title, new.url, new.notes, new.transcript); END",
+    "CREATE TRIGGER IF NOT EXISTS step_docs_ad AFTER DELETE ON step_docs BEGIN "
+    "INSERT INTO steps_fts(steps_fts, rowid, title, url, notes, transcript) "
+    "VALUES ('delete', old.id, old.title, old.url, old.notes, old.transcript); END",
+    "CREATE TRIGGER IF NOT EXISTS step_docs_au AFTER UPDATE ON step_docs BEGIN "
+    "INSERT INTO steps_fts(steps_fts, rowid, title, url, notes, transcript) "
+    "VALUES ('delete', old.id, old.title, old.url, old.notes, old.transcript); "
+    "INSERT INTO steps_fts(rowid, title, url, notes, transcript) "
+    "VALUES (new.id, new.title, new.url, new.notes, new.transcript); END",
+)
+
+STATS_KEYS = (
+    "sessions",
+    "steps",
+    "empty",
+    "with_voice",
+    "payload_bytes",
+    "total_bytes",
+    "projects",
+)
+
+
+def catalog_path(root: Path) -> Path:
+    return root / CACHE_DIRNAME / CATALOG_FILENAME
+
+
+def is_session_dir(path: Path) -> bool:
+    # _trash, _blobs, _cache, _smoke_test itp. to nie sesje użytkownika.
+    return not path.name.startswith("_") and (path / PAYLOAD_FILENAME).exists()
+
+
+def session_signature(session_dir: Path) -> int:
+    signature = 0
+    for rel in SIGNATURE_PATHS:
+        try:
+            signature = max(signature, (session_dir / rel).stat().st_mtime_ns)
+        except OSError:
+            continue
+    return signature
+
+
+def tree_bytes(path: Path) -> int:
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def step_document(session_dir: Path, step: dict) -> tuple:
+    text = step.get("text", {})
+    transcript = ""
+    clean_rel = text.get("voice_transcript_clean") or ""
+    if clean_rel:
+        try:
+            transcript = (session_dir / clean_rel).read_text(encoding="utf-8")
+        except OSError:
+            # Transkrypcja jeszcze w kolejce; krok wróci tu po jej zapisaniu.
+            transcript = ""
+    return (
+        session_dir.name,
+        step.get("id"),
+        step.get("title") or "",
+        step.get("url") or "",
+        text.get("notes_clean") or "",
+        transcript,
+    )
+
+
+def match_query(query: str) -> str:
+    """Każde słowo jako fraza FTS5 (wszystkie muszą wystąpić); `faktur*` szuka po prefiksie."""
+    phrases = []
+    for term in query.replace('"', " ").split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            phrases.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(phrases)
+
+
+def has_voice(steps: list[dict]) -> bool:
+    return any(
+        step.get("text", {}).get("voice_transcript_raw") or step.get("audio") for step in steps
+    )
+
+
+class SessionCatalog:
+    """Indeks sesji w SQLite: lista, statystyki i sprzątanie bez czytania ai_payload.json."""
+
+    def __init__(self) -> None:
+        self.logger = logging.getLogger("scribe_web")
+        self._conns: dict[Path, sqlite3.Connection] = {}
+        self._no_fts: set[Path] = set()
+        self._lock = threading.Lock()
+
+    def _connect(self, root: Path) -> sqlite3.Connection:
+        path = catalog_path(root)
+        conn = self._conns.get(path)
+        if conn is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "name TEXT PRIMARY KEY, project TEXT NOT NULL, created_at TEXT NOT NULL, "
+                "step_count INTEGER, payload_bytes INTEGER NOT NULL DEFAULT 0, "
+                "total_bytes INTEGER NOT NULL DEFAULT 0, has_voice INTEGER NOT NULL DEFAULT 0, "
+                "last_modified REAL NOT NULL, signature INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_steps ON sessions(step_count)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_project ON sessions(project)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS step_docs ("
+                "id INTEGER PRIMARY KEY, session TEXT NOT NULL, step_id INTEGER NOT NULL, "
+                "title TEXT NOT NULL, url TEXT NOT NULL, notes TEXT NOT NULL, "
+                "transcript TEXT NOT NULL, UNIQUE(session, step_id))"
+            )
+            try:
+                for statement in SEARCH_SCHEMA:
+                    conn.execute(statement)
+            except sqlite3.OperationalError as exc:
+                # SQLite bez FTS5: katalog działa, tylko wyszukiwanie jest niedostępne.
+                self.logger.error("CATALOG search disabled: %s", exc)
+                self._no_fts.add(path)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < CATALOG_VERSION:
+                conn.execute("UPDATE sessions SET signature = 0")
+                conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            conn.commit()
+            self._conns[path] = conn
+        return conn
+
+    def note_session(
+        self,
+        session_dir: Path,
+        payload: dict,
+        step: dict | None = None,
+        removed: int | None = None,
+    ) -> None:
+        """Szybki zapis z create_session/add_step/update_step; rozmiary liczy index_session.
+
+        `step` (dodany/zmieniony) trafia do indeksu wyszukiwania, `removed` (id) z niego znika.
+        """
+        meta = payload.get("session_meta", {})
+        steps = payload.get("steps", [])
+        with self._lock:
+            try:
+                conn = self._connect(session_dir.parent)
+                conn.execute(
+                    "INSERT INTO sessions (name, project, created_at, step_count, has_voice, "
+                    "last_modified) VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                    "project = excluded.project, step_count = excluded.step_count, "
+                    "has_voice = excluded.has_voice, last_modified = excluded.last_modified",
+                    (
+                        session_dir.name,
+                        meta.get("project_name", ""),
+                        meta.get("created_at", ""),
+                        len(steps),
+                        int(has_voice(steps)),
+                        time.time(),
+                    ),
+                )
+                if step is not None:
+                    self._put_steps_locked(conn, [step_document(session_dir, step)])
+                if removed is not None:
+                    conn.execute(
+                        "DELETE FROM step_docs WHERE session = ? AND step_id = ?",
+                        (session_dir.name, removed),
+                    )
+                conn.commit()
+            except sqlite3.Error as exc:
+                self.logger.error("CATALOG update failed: session=%s error=%s", session_dir, exc)
+
+    def _put_steps_locked(self, conn: sqlite3.Connection, docs: list[tuple]) -> None:
+        conn.executemany(
+            "INSERT INTO step_docs (session, step_id, title, url, notes, transcript) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(session, step_id) DO UPDATE SET "
+            "title = excluded.title, url = excluded.url, notes = excluded.notes, "
+            "transcript = excluded.transcript",
+            docs,
+        )
+
+    def index_session(self, session_dir: Path) -> None:
+        from scribe_web.core.session import load_session
+
+        signature = session_signature(session_dir)
+        try:
+            payload = load_session(session_dir).payload
+        except (OSError, ValueError) as exc:
+            # Zapisujemy wiersz bez liczby kroków, żeby uszkodzona sesja nie była czytana co raz.
+            self.logger.error("CATALOG index failed: session=%s error=%s", session_dir, exc)
+            payload = None
+        meta = (payload or {}).get("session_meta", {})
+        steps = (payload or {}).get("steps")
+        payload_bytes = 0
+        for filename in (PAYLOAD_FILENAME, JOURNAL_FILENAME):
+            try:
+                payload_bytes += (session_dir / filename).stat().st_size
+            except OSError:
+                continue
+        row = (
+            session_dir.name,
+            meta.get("project_name", ""),
+            meta.get("created_at", ""),
+            len(steps) if isinstance(steps, list) else None,
+            payload_bytes,
+            tree_bytes(session_dir),
+            int(has_voice(steps or [])),
+            signature / 1e9,
+            signature,
+        )
+        docs = [step_document(session_dir, step) for step in steps or []]
+        with self._lock:
+            try:
+                conn = self._connect(session_dir.parent)
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (name, project, created_at, step_count, "
+                    "payload_bytes, total_bytes, has_voice, last_modified, signature) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                conn.execute("DELETE FROM step_docs WHERE session = ?", (session_dir.name,))
+                self._put_steps_locked(conn, docs)
+                conn.commit()
+            except sqlite3.Error as exc:
+                self.logger.error("CATALOG index failed: session=%s error=%s", session_dir, exc)
+
+    def refresh(self, root: Path, full: bool = False) -> dict:
+        """Przeindeksowuje tylko sesje, których mtime się zmienił; usuwa wpisy znikniętych."""
+        t0 = time.perf_counter()
+        with self._lock:
+            known = dict(self._connect(root).execute("SELECT name, signature FROM sessions"))
+        indexed = skipped = 0
+        seen = set()
+        for path in sorted(root.iterdir()) if root.is_dir() else []:
+            if not path.is_dir() or not is_session_dir(path):
+                continue
+            seen.add(path.name)
+            if not full and known.get(path.name) == session_signature(path):
+                skipped += 1
+                continue
+            self.index_session(path)
+            indexed += 1
+        removed = [name for name in known if name not in seen]
+        with self._lock:
+            conn = self._connect(root)
+            conn.executemany("DELETE FROM sessions WHERE name = ?", [(n,) for n in removed])
+            conn.executemany("DELETE FROM step_docs WHERE session = ?", [(n,) for n in removed])
+            conn.commit()
+        summary = {
+            "indexed": indexed,
+            "skipped": skipped,
+            "removed": len(removed),
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+        }
+        self.logger.info(
+            "CATALOG refresh: indexed=%s skipped=%s removed=%s ms=%s",
+            summary["indexed"],
+            summary["skipped"],
+            summary["removed"],
+            summary["ms"],
+        )
+        return summary
+
+    def remove(self, root: Path, name: str) -> None:
+        with self._lock:
+            conn = self._connect(root)
+            conn.execute("DELETE FROM sessions WHERE name = ?", (name,))
+            conn.execute("DELETE FROM step_docs WHERE session = ?", (name,))
+            conn.commit()
+
+    def list_sessions(
+        self,
+        root: Path,
+        project: str | None = None,
+        empty: bool | None = None,
+    ) -> list[dict]:
+        query = f"SELECT {', '.join(COLUMNS)} FROM sessions"
+        where, args = [], []
+        if project is not None:
+            where.append("project = ?")
+            args.append(project)
+        if empty is True:
+            where.append("step_count = 0")
+        elif empty is False:
+            where.append("step_count > 0")
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY name"
+        with self._lock:
+            rows = self._connect(root).execute(query, args).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def stats(self, root: Path) -> dict:
+        with self._lock:
+            row = self._connect(root).execute(
+                "SELECT COUNT(*), COALESCE(SUM(step_count), 0), "
+                "COALESCE(SUM(step_count = 0), 0), COALESCE(SUM(has_voice), 0), "
+                "COALESCE(SUM(payload_bytes), 0), COALESCE(SUM(total_bytes), 0), "
+                "COUNT(DISTINCT project) FROM sessions"
+            ).fetchone()
+        return dict(zip(STATS_KEYS, row))
+
+    def search(self, root: Path, query: str, limit: int = SEARCH_LIMIT) -> list[dict]:
+        """Kroki ze wszystkich sesji pasujące do `query` (tytuł, URL, notatka, transkrypcja)."""
+        expression = match_query(query)
+        if not expression:
+            return []
+        with self._lock:
+            conn = self._connect(root)
+            if catalog_path(root) in self._no_fts:
+                raise RuntimeError("SQLite bez FTS5: wyszukiwanie niedostępne")
+            rows = conn.execute(
+                "SELECT d.session, s.project, d.step_id, d.title, d.url, "
+                "snippet(steps_fts, -1, '[', ']', '…', 12) "
+                "FROM steps_fts JOIN step_docs d ON d.id = steps_fts.rowid "
+                "LEFT JOIN sessions s ON s.name = d.session "
+                "WHERE steps_fts MATCH ? ORDER BY rank LIMIT ?",
+                (expression, limit),
+            ).fetchall()
+        keys = ("session", "project", "step_id", "title", "url", "snippet")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._conns.values():
+                conn.close()
+            self._conns.clear()
+
+
+CATALOG = SessionCatalog()
+
+
+def format_sessions(rows: list[dict]) -> str:
+    lines = []
+    for row in rows:
+        steps = "?" if row["step_count"] is None else row["step_count"]
+        lines.append(
+            f"{row['name']}  kroki={steps}  głos={'tak' if row['has_voice'] else 'nie'}  "
+            f"{row['total_bytes'] / 1024 / 1024:.1f} MB  {row['project']}"
+        )
+    return "\n".join(lines)
+
+
+def format_hits(hits: list[dict]) -> str:
+    lines = []
+    for hit in hits:
+        lines.append(f"{hit['session']}  krok {hit['step_id']}  {hit['title'] or hit['url']}")
+        lines.append(f"    {hit['snippet']}")
+    return "\n".join(lines)
@@ -14,6 +14,76 @@ def default_config() -> dict:
             "mask_password_fields": True,
             "redact_query_params": True,
         },
+        "journal": {
+            "compact_interval_s": 60,
+        },
+        "capture": {
+            "max_pending": 4,
+            "mode": "full",
+            "region": {"left": 0, "top": 0, "width": 1280, "height": 800},
+            "storage": "full",
+            "keyframe_interval": 10,
+            "reader_cache": 8,
+        },
+        "blobs": {
+            "enabled": True,
+        },
+        "dedup": {
+            "enabled": True,
+            "max_distance": 2,
+        },
+        "voice": {
+            "ring_seconds": 10.0,
+            "max_pcm_seconds": 120.0,
+            "streaming": False,
+            "trim_silence": False,
+            "storage_format": "wav",
+            "session_track": False,
+        },
+        "vad": {
+            "frame_ms": 30,
+            "threshold": 0.01,
+            "noise_ratio": 3.0,
+            "min_silence_s": 0.6,
+            "max_utterance_s": 20.0,
+            "preroll_s": 0.2,
+            "pad_s": 0.15,
+            "max_gap_s": 0.5,
+        },
+        "asr": {
+            "backend": "whisper",
+            "model": "base",
+            "device": "cpu",
+            "compute_type": "int8",
+            "language": "pl",
+            "vosk_model_path": "",
+            "warmup": True,
+            "idle_unload_s": 600,
+        },
+        "hotkeys": {
+            "enabled": False,
+            "step": "<ctrl>+<alt>+k",
+        },
+        "daemon": {
+            "host": "127.0.0.1",
+            "port": 0,
+            "pump_ms": 15,
+        },
+        "screen_index": {
+            "max_distance": 10,
+            "limit": 10,
+        },
+        "transcript_cache": {
+            "enabled": True,
+            "max_mb": 64,
+        },
+        "retranscribe": {
+            "max_workers": 0,
+        },
+        "encoder": {
+            "screenshot": {"format": "png", "compress_level": 1, "optimize": False},
+            "ai_copy": {"enabled": False, "format": "jpeg", "quality": 80},
+        },
     }
 
 
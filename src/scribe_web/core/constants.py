@@ -1,3 +1,5 @@
 APP_NAME = "SCRIBE_WEB"
 PAYLOAD_FILENAME = "ai_payload.json"
+JOURNAL_FILENAME = "steps.jsonl"
 DEFAULT_CONFIG_PATH = "config/config.json"
+CAPTURE_MODES = ("full", "all", "region", "window")
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+from http.client import HTTPException
+from pathlib import Path
+from typing import Any
+from urllib import error, request
+
+from scribe_web.core.paths import logs_root
+
+STATE_FILENAME = "daemon.json"
+TOKEN_HEADER = "X-Scribe-Token"
+COMMANDS = ("start", "step", "annotate", "voice", "pause", "undo", "end", "status", "quit")
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+def state_path(config: dict) -> Path:
+    return logs_root(config) / STATE_FILENAME
+
+
+def read_state(config: dict) -> dict | None:
+    try:
+        return json.loads(state_path(config).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def call(config: dict, command: str, params: dict | None = None, timeout: float = 120.0) -> Any:
+    """Klient: wysyła komendę do działającego demona i zwraca `result`."""
+    state = read_state(config)
+    if state is None:
+        raise DaemonError("Demon nie działa (brak logs/daemon.json)")
+    req = request.Request(
+        f"http://{state['host']}:{state['port']}/{command}",
+        data=json.dumps(params or {}).encode("utf-8"),
+        headers={"Content-Type": "application/json", TOKEN_HEADER: state["token"]},
+        method="POST",
+    )
+    try:
+        with request.urlopen(req, timeout=timeout) as resp:
+            body = json.loads(resp.read())
+    except error.HTTPError as exc:
+        try:
+            body = json.loads(exc.read())
+        except json.JSONDecodeError:
+            body = {"error": str(exc)}
+        raise DaemonError(body.get("error") or str(exc)) from None
+    except error.URLError as exc:
+        raise DaemonError(f"Demon nie odpowiada: {exc.reason}") from None
+    except (OSError, HTTPException) as exc:
+        raise DaemonError(f"Demon nie odpowiada: {exc}") from None
+    return body.get("result")
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+TILE = 64
+FRAMES_DIR = "steps/frames"
+
+
+def frame_rel(step_id: int) -> str:
+    return f"{FRAMES_DIR}/step_{step_id:03d}.npz"
+
+
+def frame_step_id(rel: str) -> int:
+    return int(Path(rel).stem.split("_")[-1])
+
+
+def _pad(frame: np.ndarray) -> np.ndarray:
+    height, width = frame.shape[:2]
+    pad_h = (-height) % TILE
+    pad_w = (-width) % TILE
+    if not pad_h and not pad_w:
+        return frame
+    return np.pad(frame, ((0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+
+
+def _tiles(frame: np.ndarray) -> np.ndarray:
+    height, width = frame.shape[:2]
+    return frame.reshape(height // TILE, TILE, width // TILE, TILE, 3).swapaxes(1, 2)
+
+
+def changed_tiles(prev: np.ndarray, cur: np.ndarray) -> np.ndarray:
+    diff = _tiles(prev) != _tiles(cur)
+    return np.argwhere(diff.any(axis=(2, 3, 4)))
+
+
+def _save_npz(path: Path, **arrays: np.ndarray) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.stem}.tmp.npz")
+    np.savez_compressed(tmp_path, **arrays)
+    size = tmp_path.stat().st_size
+    tmp_path.replace(path)
+    return size
+
+
+class DeltaWriter:
+    """Zapisuje klatki jako różnice kafelków względem poprzedniej klatki + co N klatek keyframe."""
+
+    def __init__(self, session_dir: Path, keyframe_interval: int = 10) -> None:
+        self.session_dir = session_dir
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._prev: np.ndarray | None = None
+        self._prev_id: int | None = None
+        self._since_key = 0
+
+    def reset(self) -> None:
+        self._prev = None
+        self._prev_id = None
+        self._since_key = 0
+
+    def write(self, step_id: int, image: Image.Image) -> dict:
+        rgb = np.asarray(image.convert("RGB"), dtype=np.uint8)
+        frame = _pad(rgb)
+        shape = np.array(rgb.shape[:2], dtype=np.int32)
+        path = self.session_dir / frame_rel(step_id)
+        is_key = (
+            self._prev is None
+            or self._prev.shape != frame.shape
+            or self._since_key >= self.keyframe_interval
+        )
+        if is_key:
+            size = _save_npz(path, shape=shape, full=frame)
+            meta = {"kind": "key", "bytes": size}
+            self._since_key = 1
+        else:
+            idx = changed_tiles(self._prev, frame)
+            tiles = _tiles(frame)[idx[:, 0], idx[:, 1]]
+            size = _save_npz(
+                path,
+                shape=shape,
+                base=np.array(self._prev_id, dtype=np.int32),
+                idx=idx.astype(np.int32),
+                tiles=tiles,
+            )
+            meta = {"kind": "delta", "base": self._prev_id, "tiles": int(len(idx)), "bytes": size}
+            self._since_key += 1
+        self._prev = frame
+        self._prev_id = step_id
+        return meta
+
+
+class DeltaReader:
+    def __init__(self, session_dir: Path, cache_size: int = 8) -> None:
+        self.session_dir = session_dir
+        self.cache_size = max(1, cache_size)
+        self._cache: OrderedDict[int, np.ndarray] = OrderedDict()
+
+    def _padded(self, step_id: int) -> np.ndarray:
+        cached = self._cache.get(step_id)
+        if cached is not None:
+            self._cache.move_to_end(step_id)
+            return cached
+        with np.load(self.session_dir / frame_rel(step_id)) as data:
+            if "full" in data.files:
+                frame = data["full"]
+            else:
+                frame = self._padded(int(data["base"])).copy()
+                idx = data["idx"]
+                tiles = data["tiles"]
+                view = _tiles(frame)
+                view[idx[:, 0], idx[:, 1]] = tiles
+        self._cache[step_id] = frame
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return frame
+
+    def forget(self, step_id: int) -> None:
+        """Cofnięty krok (i późniejsze) dostanie nowe pliki: stare klatki z cache won."""
+        for cached_id in [cached_id for cached_id in self._cache if cached_id >= step_id]:
+            del self._cache[cached_id]
+
+    def array(self, step_id: int) -> np.ndarray:
+        with np.load(self.session_dir / frame_rel(step_id)) as data:
+            height, width = (int(v) for v in data["shape"])
+        return self._padded(step_id)[:height, :width]
+
+    def image(self, step_id: int) -> Image.Image:
+        return Image.fromarray(self.array(step_id), "RGB")
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from PIL import Image, features
+
+FORMAT_EXT = {
+    "png": ".png",
+    "webp": ".webp",
+    "qoi": ".qoi",
+    "jpeg": ".jpg",
+}
+
+DEFAULT_SCREENSHOT_PROFILE = {"format": "png", "compress_level": 1, "optimize": False}
+DEFAULT_AI_COPY_PROFILE = {"enabled": False, "format": "jpeg", "quality": 80}
+
+
+def format_available(fmt: str) -> bool:
+    if fmt == "png" or fmt == "jpeg":
+        return True
+    if fmt == "webp":
+        return bool(features.check("webp"))
+    if fmt == "qoi":
+        Image.init()
+        return "QOI" in Image.SAVE
+    return False
+
+
+def resolve_profile(profile: dict | None, default: dict = DEFAULT_SCREENSHOT_PROFILE) -> dict:
+    resolved = dict(default)
+    resolved.update(profile or {})
+    fmt = str(resolved.get("format", "png")).lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if not format_available(fmt):
+        fmt = "png"
+    resolved["format"] = fmt
+    return resolved
+
+
+def screenshot_profile(config: dict) -> dict:
+    return resolve_profile(config.get("encoder", {}).get("screenshot"))
+
+
+def ai_copy_profile(config: dict) -> dict | None:
+    profile = resolve_profile(
+        config.get("encoder", {}).get("ai_copy"),
+        default=DEFAULT_AI_COPY_PROFILE,
+    )
+    if not profile.get("enabled"):
+        return None
+    return profile
+
+
+def extension_for(profile: dict) -> str:
+    return FORMAT_EXT[profile["format"]]
+
+
+def _save_kwargs(profile: dict) -> dict:
+    fmt = profile["format"]
+    if fmt == "png":
+        return {
+            "format": "PNG",
+            "compress_level": int(profile.get("compress_level", 1)),
+            "optimize": bool(profile.get("optimize", False)),
+        }
+    if fmt == "webp":
+        return {
+            "format": "WEBP",
+            "lossless": bool(profile.get("lossless", True)),
+            "quality": int(profile.get("quality", 80)),
+            "method": int(profile.get("method", 0)),
+        }
+    if fmt == "jpeg":
+        return {
+            "format": "JPEG",
+            "quality": int(profile.get("quality", 80)),
+            "optimize": bool(profile.get("optimize", False)),
+        }
+    return {"format": "QOI"}
+
+
+def save_image(image: Image.Image, out_path: Path, profile: dict) -> int:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(f"{out_path.suffix}.tmp")
+    image.save(tmp_path, **_save_kwargs(profile))
+    size = tmp_path.stat().st_size
+    tmp_path.replace(out_path)
+    return size
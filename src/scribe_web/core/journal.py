@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+
+def append_op(path: Path, op: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(line)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def read_ops(path: Path) -> list[dict]:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    ops = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            op = json.loads(line)
+        except json.JSONDecodeError:
+            # Ostatnia linia mogła zostać ucięta przy awarii - reszta jest spójna.
+            break
+        if isinstance(op, dict):
+            ops.append(op)
+    return ops
+
+
+def _index_of(steps: list[dict], step_id) -> int | None:
+    for i, step in enumerate(steps):
+        if step.get("id") == step_id:
+            return i
+    return None
+
+
+def apply_op(payload: dict, op: dict) -> None:
+    steps = payload.setdefault("steps", [])
+    kind = op.get("op")
+    if kind in ("add_step", "update_step"):
+        step = op.get("step") or {}
+        idx = _index_of(steps, step.get("id"))
+        if idx is None:
+            steps.append(step)
+        else:
+            steps[idx] = step
+    elif kind == "undo":
+        idx = _index_of(steps, op.get("step_id"))
+        if idx is not None:
+            steps.pop(idx)
+
+
+def replay(payload: dict, ops: list[dict]) -> dict:
+    for op in ops:
+        apply_op(payload, op)
+    return payload
+
+
+def truncate(path: Path) -> None:
+    if not path.exists():
+        return
+    with path.open("w", encoding="utf-8") as fh:
+        fh.flush()
+        os.fsync(fh.fileno())
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Any
+
+# Whisper i faster-whisper przyjmują tablicę float32 16 kHz mono zamiast ścieżki (bez ffmpeg).
+SAMPLE_RATE = 16000
+
+
+def to_pcm16(block: Any) -> Any:
+    """float32 [-1, 1] -> int16; te same próbki idą do pliku WAV i do ASR."""
+    import numpy as np
+
+    return np.clip(np.rint(block * 32767.0), -32768, 32767).astype(np.int16)
+
+
+def to_float32(pcm: Any) -> Any:
+    # Tak samo jak whisper.load_audio (int16 / 32768), więc wynik nie zależy od ścieżki wejścia.
+    import numpy as np
+
+    return pcm.astype(np.float32) / 32768.0
+
+
+def read_pcm16(path: Path) -> tuple[Any, int]:
+    import numpy as np
+    import soundfile as sf
+
+    audio, samplerate = sf.read(str(path), dtype="int16", always_2d=True)
+    if audio.shape[1] == 1:
+        return np.ascontiguousarray(audio[:, 0]), samplerate
+    return audio.mean(axis=1).astype(np.int16), samplerate
+
+
+def pcm_digest(pcm: Any) -> str:
+    import numpy as np
+
+    return hashlib.sha256(np.ascontiguousarray(pcm).tobytes()).hexdigest()
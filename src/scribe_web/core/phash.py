@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+SAMPLES_PER_CELL = 4
+
+
+def _gray_cells(bgra: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    height, width = bgra.shape[:2]
+    ys = np.linspace(0, height - 1, rows * SAMPLES_PER_CELL).astype(np.intp)
+    xs = np.linspace(0, width - 1, cols * SAMPLES_PER_CELL).astype(np.intp)
+    # Próbkujemy tylko siatkę punktów zamiast skalować całą klatkę 4K.
+    sampled = bgra[ys[:, None], xs[None, :], :3].astype(np.float32)
+    gray = sampled @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+    cells = gray.reshape(rows, SAMPLES_PER_CELL, cols, SAMPLES_PER_CELL)
+    return cells.mean(axis=(1, 3))
+
+
+def dhash_array(bgra: np.ndarray) -> int:
+    cells = _gray_cells(bgra, HASH_SIZE, HASH_SIZE + 1)
+    bits = (cells[:, 1:] > cells[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def dhash_screenshot(screenshot: Any) -> int:
+    width, height = screenshot.size
+    bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(height, width, 4)
+    return dhash_array(bgra)
+
+
+def dhash_image(image: Any) -> int:
+    rgb = np.asarray(image.convert("RGB"), dtype=np.uint8)
+    return dhash_array(rgb[:, :, ::-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def similarity(distance: int) -> float:
+    return round(1.0 - distance / HASH_BITS, 4)
+
+
+def to_hex(value: int) -> str:
+    return f"{value:0{HASH_BITS // 4}x}"
+
+
+def from_hex(text: str) -> int:
+    return int(text, 16)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from scribe_web.core.blobs import file_digest
+from scribe_web.core.catalog import CATALOG
+from scribe_web.core.session import compact_session, load_session
+from scribe_web.core.transcript_cache import CACHE
+from scribe_web.core.utils import atomic_write_json, atomic_write_text
+
+MANIFEST_NAME = "_asr_manifest.json"
+RECORDING_RE = re.compile(r"^step_(\d{3,})\.(wav|flac|ogg)$")
+# Gdy krok ma kilka nagrań, bierzemy najmniej stratne (oryginał przed kompresją).
+RECORDING_PREFERENCE = ("wav", "flac", "ogg")
+
+# Orientacyjna pamięć jednego procesu z modelem (GB), do doboru liczby procesów.
+MODEL_MEMORY_GB = {
+    "tiny": 1.0,
+    "base": 1.0,
+    "small": 2.0,
+    "medium": 5.0,
+    "large": 10.0,
+}
+
+
+def find_recordings(session_dir: Path) -> dict[int, Path]:
+    found: dict[int, Path] = {}
+    transcripts = session_dir / "transcripts"
+    if not transcripts.is_dir():
+        return found
+    for path in transcripts.iterdir():
+        match = RECORDING_RE.match(path.name)
+        if match is None:
+            continue
+        step_id = int(match.group(1))
+        current = found.get(step_id)
+        rank = RECORDING_PREFERENCE.index(match.group(2))
+        if current is None or rank < RECORDING_PREFERENCE.index(current.suffix[1:]):
+            found[step_id] = path
+    return dict(sorted(found.items()))
+
+
+def _available_memory_gb() -> float | None:
+    try:
+        import psutil
+    except ModuleNotFoundError:
+        psutil = None
+    if psutil is not None:
+        return psutil.virtual_memory().available / 1024**3
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 1024**3
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def pool_size(config: dict) -> int:
+    configured = int(config.get("retranscribe", {}).get("max_workers", 0) or 0)
+    if configured > 0:
+        return configured
+    workers = os.cpu_count() or 1
+    model = str(config.get("asr", {}).get("model", "base")).split(".")[0].split("-")[0]
+    per_worker = MODEL_MEMORY_GB.get(model, 2.0)
+    available = _available_memory_gb()
+    if available is not None:
+        workers = min(workers, max(1, int(available // per_worker)))
+    return max(1, workers)
+
+
+def _read_manifest(session_dir: Path) -> dict:
+    try:
+        path = session_dir / "transcripts" / MANIFEST_NAME
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _worker_init(config: dict) -> None:
+    from scribe_web.core.asr_models import MODELS
+
+    config = dict(config)
+    config["asr"] = {**config.get("asr", {}), "warmup": False, "idle_unload_s": 0}
+    MODELS.configure(config)
+    CACHE.configure(config)
+
+
+def _worker_transcribe(wav: str, vad: dict | None) -> str:
+    from scribe_web.core.transcribe_runtime import transcribe_pl_optional
+
+    raw_text, _clean = transcribe_pl_optional(Path(wav), vad)
+    return raw_text
+
+
+def _apply_session(session_dir: Path, results: dict[int, str], manifest: dict) -> None:
+    ctx = load_session(session_dir)
+    steps = {step.get("id"): step for step in ctx.payload.get("steps", [])}
+    for step_id, raw_text in results.items():
+        raw_rel = f"transcripts/step_{step_id:03d}_raw.txt"
+        clean_rel = f"transcripts/step_{step_id:03d}_clean.txt"
+        raw_abs = session_dir / raw_rel
+        clean_abs = session_dir / clean_rel
+        old_raw = raw_abs.read_text(encoding="utf-8") if raw_abs.exists() else None
+        old_clean = clean_abs.read_text(encoding="utf-8") if clean_abs.exists() else None
+        atomic_write_text(raw_abs, raw_text)
+        # Ręcznie poprawionego clean nie nadpisujemy.
+        if old_clean is None or old_clean == old_raw:
+            atomic_write_text(clean_abs, raw_text)
+        step = steps.get(step_id)
+        if step is not None:
+            step_text = step.setdefault("text", {})
+            step_text["voice_transcript_raw"] = raw_rel
+            step_text["voice_transcript_clean"] = clean_rel
+    atomic_write_json(session_dir / "transcripts" / MANIFEST_NAME, manifest)
+    # Jeden zapis ai_payload.json na sesję, niezależnie od liczby kroków.
+    compact_session(ctx)
+    CATALOG.index_session(session_dir)
+
+
+def retranscribe_sessions(
+    session_dirs: list[Path],
+    config: dict,
+    vad: dict | None = None,
+    logger: logging.Logger | None = None,
+) -> dict:
+    from scribe_web.core.asr_models import MODELS
+
+    logger = logger or logging.getLogger("scribe_web")
+    MODELS.configure(config)
+    CACHE.configure(config)
+    if not MODELS.available():
+        raise ModuleNotFoundError("No ASR backend installed (whisper/faster-whisper/vosk)")
+    model_key = MODELS.model_key()
+
+    todo: list[tuple[Path, int, Path, str]] = []
+    manifests: dict[Path, dict] = {}
+    skipped = 0
+    for session_dir in session_dirs:
+        manifest = _read_manifest(session_dir)
+        manifests[session_dir] = manifest
+        for step_id, wav in find_recordings(session_dir).items():
+            digest = file_digest(wav)
+            cached = manifest.get(wav.name, {})
+            raw_exists = (session_dir / f"transcripts/step_{step_id:03d}_raw.txt").exists()
+            if cached.get("sha256") == digest and cached.get("model") == model_key and raw_exists:
+                skipped += 1
+                continue
+            todo.append((session_dir, step_id, wav, digest))
+
+    results: dict[Path, dict[int, str]] = {}
+    failed = 0
+    workers = min(pool_size(config), max(1, len(todo)))
+    logger.info("RETRANSCRIBE start: files=%s skipped=%s workers=%s", len(todo), skipped, workers)
+    if todo:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_worker_init,
+            initargs=(config,),
+        )
+        with pool:
+            futures = {
+                pool.submit(_worker_transcribe, str(wav), vad): (session_dir, step_id, wav, digest)
+                for session_dir, step_id, wav, digest in todo
+            }
+            for future in as_completed(futures):
+                session_dir, step_id, wav, digest = futures[future]
+                try:
+                    raw_text = future.result()
+                except Exception as exc:
+                    failed += 1
+                    logger.error("RETRANSCRIBE failed: %s error=%s", wav, exc)
+                    continue
+                results.setdefault(session_dir, {})[step_id] = raw_text
+                manifests[session_dir][wav.name] = {"sha256": digest, "model": model_key}
+
+    for session_dir, session_results in results.items():
+        _apply_session(session_dir, session_results, manifests[session_dir])
+        logger.info("RETRANSCRIBE session: %s steps=%s", session_dir.name, len(session_results))
+
+    return {
+        "sessions": len(session_dirs),
+        "transcribed": sum(len(r) for r in results.values()),
+        "skipped": skipped,
+        "failed": failed,
+        "workers": workers,
+    }
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+from scribe_web.core.catalog import CATALOG, catalog_path, session_signature
+from scribe_web.core.phash import dhash_image, from_hex, hamming, similarity, to_hex
+
+# Zrzuty kroków (także czyste `_orig` sprzed adnotacji); lżejsze kopie `_ai` pomijamy.
+SCREEN_RE = re.compile(r"^step_(\d{3,})(_orig)?\.(png|webp|jpe?g|qoi)$")
+# Krok bez własnego pliku (klatka delta, duplikat) wchodzi do indeksu z dHashem z payloadu.
+PAYLOAD_PREFIX = "ai_payload.json#"
+
+DEFAULT_SCREEN_INDEX = {
+    "max_distance": 10,
+    "limit": 10,
+}
+
+
+def screen_index_settings(config: dict) -> dict:
+    settings = dict(DEFAULT_SCREEN_INDEX)
+    settings.update(config.get("screen_index", {}))
+    return settings
+
+
+def hash_image_file(path: Path) -> int:
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            return dhash_image(image)
+    except Image.DecompressionBombError as exc:
+        raise ValueError(f"Obraz za duży do porównania: {path} ({exc})") from exc
+
+
+class BKTree:
+    """Drzewo BK w metryce Hamminga: zapytanie o promień r schodzi tylko do dzieci d-r..d+r."""
+
+    def __init__(self) -> None:
+        # Węzeł: [hash, elementy o tym samym hashu, {odległość: dziecko}].
+        self.root: list | None = None
+        self.size = 0
+
+    def add(self, value: int, item: Any) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> list[tuple[int, Any]]:
+        hits = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                hits.extend((distance, item) for item in node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return hits
+
+
+class ScreenIndex:
+    """dHash zrzutów wszystkich sesji (tabela step_images w bazie katalogu) + drzewo BK."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.logger = logging.getLogger("scribe_web")
+        path = catalog_path(root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS step_images ("
+            "session TEXT NOT NULL, rel TEXT NOT NULL, step_id INTEGER NOT NULL, "
+            "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, phash TEXT NOT NULL, "
+            "PRIMARY KEY (session, rel))"
+        )
+        # Sygnatura sesji, przy której wpisy z payloadu były ostatnio odczytane.
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS step_image_payloads ("
+            "session TEXT PRIMARY KEY, signature INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+        self._tree: BKTree | None = None
+
+    def update(self) -> dict:
+        """Hashuje tylko nowe lub zmienione pliki (rozmiar, mtime); usuwa wpisy po skasowanych.
+
+        Payload sesji jest czytany tylko po zmianie jej sygnatury.
+        """
+        t0 = time.perf_counter()
+        CATALOG.refresh(self.root)
+        known = {
+            (session, rel): (size, mtime_ns)
+            for session, rel, size, mtime_ns in self.conn.execute(
+                "SELECT session, rel, size, mtime_ns FROM step_images"
+            )
+        }
+        scanned = dict(self.conn.execute("SELECT session, signature FROM step_image_payloads"))
+        sessions = [row["name"] for row in CATALOG.list_sessions(self.root)]
+        listed = set(sessions)
+        from_payload_keys: dict[str, list[tuple[str, str]]] = {}
+        for key in known:
+            if key[1].startswith(PAYLOAD_PREFIX):
+                from_payload_keys.setdefault(key[0], []).append(key)
+        seen = set()
+        hashed = failed = from_payload = 0
+        for session in sessions:
+            try:
+                entries = list(os.scandir(self.root / session / "steps"))
+            except OSError:
+                entries = []
+            own = set()
+            for entry in entries:
+                match = SCREEN_RE.match(entry.name)
+                if match is None or not entry.is_file():
+                    continue
+                rel = f"steps/{entry.name}"
+                key = (session, rel)
+                seen.add(key)
+                stat = entry.stat()
+                if known.get(key) == (stat.st_size, stat.st_mtime_ns):
+                    own.add(int(match.group(1)))
+                    continue
+                try:
+                    value = hash_image_file(Path(entry.path))
+                except (OSError, ValueError) as exc:
+                    self.logger.error("SCREEN_INDEX hash failed: %s error=%s", entry.path, exc)
+                    failed += 1
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO step_images "
+                    "(session, rel, step_id, size, mtime_ns, phash) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        session,
+                        rel,
+                        int(match.group(1)),
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        to_hex(value),
+                    ),
+                )
+                own.add(int(match.group(1)))
+                hashed += 1
+            signature = session_signature(self.root / session)
+            if scanned.get(session) == signature:
+                seen.update(from_payload_keys.get(session, []))
+                continue
+            for step_id, phash in self._payload_hashes(session, own):
+                rel = f"{PAYLOAD_PREFIX}step_{step_id:03d}"
+                seen.add((session, rel))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO step_images "
+                    "(session, rel, step_id, size, mtime_ns, phash) VALUES (?, ?, ?, 0, ?, ?)",
+                    (session, rel, step_id, signature, phash),
+                )
+                from_payload += 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO step_image_payloads (session, signature) VALUES (?, ?)",
+                (session, signature),
+            )
+        removed = [key for key in known if key not in seen]
+        self.conn.executemany("DELETE FROM step_images WHERE session = ? AND rel = ?", removed)
+        self.conn.executemany(
+            "DELETE FROM step_image_payloads WHERE session = ?",
+            [(session,) for session in scanned if session not in listed],
+        )
+        self.conn.commit()
+        if hashed or from_payload or removed:
+            self._tree = None
+        summary = {
+            "hashed": hashed,
+            "from_payload": from_payload,
+            "skipped": len(seen) - hashed - failed - from_payload,
+            "removed": len(removed),
+            "failed": failed,
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+        }
+        self.logger.info(
+            "SCREEN_INDEX update: hashed=%s from_payload=%s skipped=%s removed=%s failed=%s ms=%s",
+            summary["hashed"],
+            summary["from_payload"],
+            summary["skipped"],
+            summary["removed"],
+            summary["failed"],
+            summary["ms"],
+        )
+        return summary
+
+    def _payload_hashes(self, session: str, own: set[int]) -> list[tuple[int, str]]:
+        """(id, dHash) kroków bez własnego pliku zrzutu, z payloadu i dziennika sesji."""
+        from scribe_web.core.session import load_session
+
+        try:
+            steps = load_session(self.root / session).payload.get("steps", [])
+        except (OSError, ValueError) as exc:
+            self.logger.error("SCREEN_INDEX payload failed: session=%s error=%s", session, exc)
+            return []
+        return [
+            (step["id"], step["phash"])
+            for step in steps
+            if step.get("phash") and step.get("id") not in own
+        ]
+
+    def tree(self) -> BKTree:
+        if self._tree is None:
+            tree = BKTree()
+            for session, rel, step_id, phash in self.conn.execute(
+                "SELECT session, rel, step_id, phash FROM step_images"
+            ):
+                tree.add(from_hex(phash), (session, step_id, rel))
+            self._tree = tree
+        return self._tree
+
+    def step_hash(self, session: str, step_id: int) -> int | None:
+        rows = self.conn.execute(
+            "SELECT rel, phash FROM step_images WHERE session = ? AND step_id = ?",
+            (session, step_id),
+        ).fetchall()
+        if not rows:
+            return None
+        # Czysty zrzut (_orig) lepiej oddaje ekran niż wersja z adnotacją.
+        rows.sort(key=lambda row: "_orig" not in row[0])
+        return from_hex(rows[0][1])
+
+    def nearest(
+        self,
+        value: int,
+        limit: int = DEFAULT_SCREEN_INDEX["limit"],
+        max_distance: int = DEFAULT_SCREEN_INDEX["max_distance"],
+        exclude: tuple[str, int] | None = None,
+    ) -> list[dict]:
+        best: dict[tuple[str, int], tuple[int, str]] = {}
+        for distance, (session, step_id, rel) in self.tree().search(value, max_distance):
+            key = (session, step_id)
+            if key == exclude:
+                continue
+            if key not in best or distance < best[key][0]:
+                best[key] = (distance, rel)
+        ranked = sorted(best.items(), key=lambda item: (item[1][0], item[0]))[:limit]
+        hits = []
+        for (session, step_id), (distance, rel) in ranked:
+            doc = self.conn.execute(
+                "SELECT title, url FROM step_docs WHERE session = ? AND step_id = ?",
+                (session, step_id),
+            ).fetchone()
+            hits.append(
+                {
+                    "session": session,
+                    "step_id": step_id,
+                    "screenshot": rel,
+                    "distance": distance,
+                    "similarity": similarity(distance),
+                    "title": doc[0] if doc else "",
+                    "url": doc[1] if doc else "",
+                }
+            )
+        return hits
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def parse_step_ref(target: str) -> tuple[str, int] | None:
+    """`SESJA:KROK` (nazwa katalogu sesji albo ścieżka) -> (nazwa, id); inaczej None."""
+    session, sep, step = target.rpartition(":")
+    if not sep or not session or not step.isdigit():
+        return None
+    return Path(session).name, int(step)
+
+
+def find_similar(config: dict, target: str) -> list[dict]:
+    """Najbliższe kroki dla pliku obrazu albo odwołania `SESJA:KROK`, ze wszystkich sesji."""
+    from scribe_web.core.paths import sessions_root
+
+    settings = screen_index_settings(config)
+    index = ScreenIndex(sessions_root(config))
+    try:
+        index.update()
+        exclude = None
+        if Path(target).is_file():
+            value = hash_image_file(Path(target))
+        else:
+            exclude = parse_step_ref(target)
+            value = index.step_hash(*exclude) if exclude else None
+            if value is None:
+                raise ValueError(f"Brak zrzutu: {target} (podaj plik obrazu albo SESJA:KROK)")
+        return index.nearest(
+            value,
+            limit=int(settings["limit"]),
+            max_distance=int(settings["max_distance"]),
+            exclude=exclude,
+        )
+    finally:
+        index.close()
+
+
+def format_similar(hits: list[dict]) -> str:
+    lines = []
+    for hit in hits:
+        lines.append(
+            f"{hit['session']}  krok {hit['step_id']}  odl={hit['distance']} "
+            f"({hit['similarity']:.0%})  {hit['title'] or hit['url'] or hit['screenshot']}"
+        )
+    return "\n".join(lines)
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import json
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+from scribe_web.core.catalog import CATALOG
+from scribe_web.core.constants import JOURNAL_FILENAME, PAYLOAD_FILENAME
+from scribe_web.core.journal import append_op, read_ops, replay, truncate
 from scribe_web.core.paths import repo_root
 from scribe_web.core.payload_v1 import build_payload
 from scribe_web.core.utils import atomic_write_json, slugify
@@ -17,6 +21,9 @@ class SessionContext:
     session_dir: Path
     payload_path: Path
     payload: dict
+    journal_path: Path | None = None
+    journal_ops: int = 0
+    compacted_at: float = 0.0
 
 
 def _session_timestamp() -> str:
@@ -33,29 +40,79 @@ def create_session(project_name: str, config: dict) -> SessionContext:
     (session_dir / "logs").mkdir(parents=True, exist_ok=True)
 
     payload = build_payload(project_name)
-    payload_path = session_dir / "ai_payload.json"
+    payload_path = session_dir / PAYLOAD_FILENAME
     atomic_write_json(payload_path, payload)
+    CATALOG.note_session(session_dir, payload)
 
     return SessionContext(
         project_name=project_name,
         session_dir=session_dir,
         payload_path=payload_path,
         payload=payload,
+        journal_path=session_dir / JOURNAL_FILENAME,
+        compacted_at=time.monotonic(),
     )
 
 
+def _journal(ctx: SessionContext, op: dict) -> None:
+    if ctx.journal_path is None:
+        atomic_write_json(ctx.payload_path, ctx.payload)
+        return
+    append_op(ctx.journal_path, op)
+    ctx.journal_ops += 1
+
+
 def add_step(ctx: SessionContext, step: dict) -> None:
     ctx.payload.setdefault("steps", []).append(step)
+    _journal(ctx, {"op": "add_step", "step": step})
+    CATALOG.note_session(ctx.session_dir, ctx.payload, step=step)
+
+
+def update_step(ctx: SessionContext, step: dict, action: str) -> None:
+    _journal(ctx, {"op": "update_step", "action": action, "step": step})
+    CATALOG.note_session(ctx.session_dir, ctx.payload, step=step)
+
+
+def undo_step(ctx: SessionContext) -> dict | None:
+    steps = ctx.payload.get("steps", [])
+    if not steps:
+        return None
+    step = steps.pop()
+    _journal(ctx, {"op": "undo", "step_id": step.get("id")})
+    CATALOG.note_session(ctx.session_dir, ctx.payload, removed=step.get("id"))
+    return step
+
+
+def compact_session(ctx: SessionContext) -> None:
     atomic_write_json(ctx.payload_path, ctx.payload)
+    if ctx.journal_path is not None:
+        truncate(ctx.journal_path)
+    ctx.journal_ops = 0
+    ctx.compacted_at = time.monotonic()
+
+
+def maybe_compact(ctx: SessionContext, interval_s: float) -> bool:
+    if ctx.journal_ops == 0:
+        return False
+    if time.monotonic() - ctx.compacted_at < interval_s:
+        return False
+    compact_session(ctx)
+    return True
 
 
 def load_session(session_dir: Path) -> SessionContext:
-    payload_path = session_dir / "ai_payload.json"
+    payload_path = session_dir / PAYLOAD_FILENAME
     payload = json.loads(payload_path.read_text(encoding="utf-8"))
+    journal_path = session_dir / JOURNAL_FILENAME
+    ops = read_ops(journal_path)
+    replay(payload, ops)
     project_name = payload.get("session_meta", {}).get("project_name", "")
     return SessionContext(
         project_name=project_name,
         session_dir=session_dir,
         payload_path=payload_path,
         payload=payload,
+        journal_path=journal_path,
+        journal_ops=len(ops),
+        compacted_at=time.monotonic(),
     )
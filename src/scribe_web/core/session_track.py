@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import bisect
+from pathlib import Path
+
+from scribe_web.core.session import SessionContext, update_step
+from scribe_web.core.utils import atomic_write_json, atomic_write_text
+
+# Jedno nagranie na całą sesję; K zapisuje w kroku tylko sekundę tego pliku.
+TRACK_REL = "transcripts/session.wav"
+SEGMENTS_REL = "transcripts/session_segments.json"
+
+
+def step_markers(steps: list[dict]) -> list[tuple[float, int]]:
+    """(sekunda startu, id kroku) posortowane po czasie, tylko kroki z markerem ścieżki."""
+    return sorted(
+        (float(step["audio"]["start"]), step["id"])
+        for step in steps
+        if step.get("audio", {}).get("start") is not None
+    )
+
+
+def assign_segments(
+    segments: list[dict], markers: list[tuple[float, int]]
+) -> dict[int, list[dict]]:
+    """Odcinek należy do kroku, w którego przedziale [K_i, K_i+1) leży jego środek."""
+    by_step: dict[int, list[dict]] = {step_id: [] for _start, step_id in markers}
+    if not markers:
+        return by_step
+    starts = [start for start, _step_id in markers]
+    for seg in segments:
+        middle = (seg["start"] + seg["end"]) / 2
+        # Mowa sprzed pierwszego K opisuje zwykle pierwszy krok.
+        index = max(bisect.bisect_right(starts, middle) - 1, 0)
+        by_step[markers[index][1]].append(seg)
+    return by_step
+
+
+def apply_session_track(
+    ctx: SessionContext,
+    track: Path,
+    segments: list[dict],
+    duration: float,
+) -> dict:
+    """Rozdziela transkrypcję ścieżki sesji na kroki: pliki step_NNN_*.txt i zakresy audio."""
+    track_rel = track.relative_to(ctx.session_dir).as_posix()
+    atomic_write_json(
+        ctx.session_dir / SEGMENTS_REL,
+        {"track": track_rel, "duration_s": round(duration, 3), "segments": segments},
+    )
+    steps = {step["id"]: step for step in ctx.payload.get("steps", [])}
+    markers = step_markers(list(steps.values()))
+    by_step = assign_segments(segments, markers)
+    transcribed = 0
+    for index, (start, step_id) in enumerate(markers):
+        step = steps[step_id]
+        end = markers[index + 1][0] if index + 1 < len(markers) else duration
+        step["audio"] = {"track": track_rel, "start": start, "end": round(max(end, start), 3)}
+        text = " ".join(seg["text"] for seg in by_step[step_id]).strip()
+        if text:
+            raw_rel = f"transcripts/step_{step_id:03d}_raw.txt"
+            clean_rel = f"transcripts/step_{step_id:03d}_clean.txt"
+            atomic_write_text(ctx.session_dir / raw_rel, text)
+            atomic_write_text(ctx.session_dir / clean_rel, text)
+            step_text = step.setdefault("text", {})
+            step_text["voice_transcript_raw"] = raw_rel
+            step_text["voice_transcript_clean"] = clean_rel
+            transcribed += 1
+        update_step(ctx, step, "voice")
+    return {"segments": len(segments), "steps": len(markers), "transcribed": transcribed}
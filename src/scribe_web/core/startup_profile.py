@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Proces-dziecko z tą zmienną zamyka panel zaraz po pierwszym narysowaniu.
+PROBE_ENV = "SCRIBE_STARTUP_PROBE"
+PAINT_MARKER = "SCRIBE_STARTUP painted_at="
+STARTUP_BUDGET_MS = 1000.0
+
+# Nie powinny się ładować, zanim użytkownik czegoś nie kliknie.
+HEAVY_PREFIXES = ("mss", "PIL", "numpy", "sounddevice", "soundfile", "whisper", "torch")
+
+PANEL_ARGS = ("-m", "scribe_web", "--panel")
+IMPORT_ARGS = ("-c", "import scribe_web.ui.panel")
+
+
+def report_painted() -> None:
+    print(f"{PAINT_MARKER}{time.time():.6f}", file=sys.stderr, flush=True)
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        entries.append(
+            {
+                "name": stripped,
+                "depth": (len(name) - len(stripped) - 1) // 2,
+                "self_us": self_us,
+                "cumulative_us": cumulative_us,
+            }
+        )
+    return entries
+
+
+def run_probe(args: tuple[str, ...] = PANEL_ARGS, timeout: float = 60.0) -> dict:
+    import subprocess
+
+    src_dir = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ)
+    env[PROBE_ENV] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    t0 = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=timeout,
+    )
+    wall_ms = (time.time() - t0) * 1000
+    painted_ms = None
+    for line in proc.stderr.splitlines():
+        if line.startswith(PAINT_MARKER):
+            painted_ms = (float(line[len(PAINT_MARKER) :]) - t0) * 1000
+    imports = parse_importtime(proc.stderr)
+    errors = [
+        line
+        for line in proc.stderr.splitlines()
+        if not line.startswith(("import time:", PAINT_MARKER))
+    ]
+    return {
+        "args": list(args),
+        "returncode": proc.returncode,
+        "wall_ms": wall_ms,
+        "painted_ms": painted_ms,
+        "imports": imports,
+        "heavy": heavy_modules(imports),
+        "error": errors[-1] if proc.returncode and errors else "",
+    }
+
+
+def heavy_modules(imports: list[dict]) -> list[str]:
+    return sorted(
+        {
+            entry["name"]
+            for entry in imports
+            if entry["name"].split(".")[0] in HEAVY_PREFIXES and "." not in entry["name"]
+        }
+    )
+
+
+def top_imports(imports: list[dict], limit: int = 15) -> list[dict]:
+    return sorted(imports, key=lambda entry: entry["cumulative_us"], reverse=True)[:limit]
+
+
+def profile_startup() -> dict:
+    """Panel na zimnym interpreterze; bez ekranu zostaje pomiar samego importu."""
+    result = run_probe(PANEL_ARGS)
+    if result["painted_ms"] is None:
+        result = {**run_probe(IMPORT_ARGS), "panel_error": result["error"]}
+    return result
+
+
+def format_report(result: dict, limit: int = 15) -> str:
+    lines = []
+    if result["painted_ms"] is not None:
+        verdict = "OK" if result["painted_ms"] <= STARTUP_BUDGET_MS else "WOLNO"
+        lines.append(
+            f"STARTUP panel painted: {result['painted_ms']:.0f} ms "
+            f"(budżet {STARTUP_BUDGET_MS:.0f} ms, {verdict})"
+        )
+    else:
+        lines.append(f"STARTUP import only: {result['wall_ms']:.0f} ms (panel się nie uruchomił)")
+        if result.get("panel_error"):
+            lines.append(f"  panel: {result['panel_error']}")
+    total_us = sum(entry["cumulative_us"] for entry in result["imports"] if entry["depth"] == 0)
+    lines.append(f"Importy: {len(result['imports'])} modułów, {total_us / 1000:.0f} ms")
+    for entry in top_imports(result["imports"], limit):
+        lines.append(f"  {entry['cumulative_us'] / 1000:8.1f} ms  {entry['name']}")
+    if result["heavy"]:
+        lines.append("Ciężkie moduły przy starcie: " + ", ".join(result["heavy"]))
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from scribe_web.core.utils import atomic_write_text
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_STOP = object()
+
+
+@dataclass
+class TranscriptionJob:
+    step_id: int
+    wav_path: Path
+    raw_path: Path
+    clean_path: Path
+    transcribe: Callable[[Path], tuple[str, str]] | None = None
+    # Po transkrypcji: kompresja/przeniesienie nagrania; zwraca ścieżkę, pod którą zostało.
+    store: Callable[[Path], Path] | None = None
+    state: str = QUEUED
+    raw_text: str = ""
+    clean_text: str = ""
+    error: str = ""
+    audio_path: Path | None = None
+
+
+@dataclass
+class SegmentsJob:
+    """ASR całego nagrania (ścieżka sesji) z czasami odcinków; `context` wraca z wynikiem."""
+
+    wav_path: Path
+    transcribe: Callable[[Path], list[dict]]
+    store: Callable[[Path], Path] | None = None
+    context: Any = None
+    state: str = QUEUED
+    segments: list[dict] = field(default_factory=list)
+    error: str = ""
+    audio_path: Path | None = None
+
+
+class TranscriptionQueue:
+    """Transkrypcja w wątku roboczym; wyniki odbiera wątek UI przez drain_completed()."""
+
+    def __init__(
+        self,
+        transcribe: Callable[[Path], tuple[str, str]],
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.transcribe = transcribe
+        self.logger = logger or logging.getLogger("scribe_web")
+        self.jobs: dict[int, TranscriptionJob] = {}
+        self.segment_jobs: list[SegmentsJob] = []
+        self._queue: queue.Queue = queue.Queue()
+        self._completed: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="scribe-transcribe", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        step_id: int,
+        wav_path: Path,
+        raw_path: Path,
+        clean_path: Path,
+        transcribe: Callable[[Path], tuple[str, str]] | None = None,
+        store: Callable[[Path], Path] | None = None,
+    ) -> TranscriptionJob:
+        job = TranscriptionJob(step_id, wav_path, raw_path, clean_path, transcribe, store)
+        self.jobs[step_id] = job
+        self._queue.put(job)
+        return job
+
+    def submit_segments(
+        self,
+        wav_path: Path,
+        transcribe: Callable[[Path], list[dict]],
+        store: Callable[[Path], Path] | None = None,
+        context: Any = None,
+    ) -> SegmentsJob:
+        job = SegmentsJob(wav_path, transcribe, store, context)
+        self.segment_jobs.append(job)
+        self._queue.put(job)
+        return job
+
+    def states(self) -> dict[int, str]:
+        return {step_id: job.state for step_id, job in self.jobs.items()}
+
+    def pending(self) -> int:
+        jobs = [*self.jobs.values(), *self.segment_jobs]
+        return sum(1 for job in jobs if job.state in (QUEUED, RUNNING))
+
+    def drain_completed(self) -> list[TranscriptionJob | SegmentsJob]:
+        done = []
+        while True:
+            try:
+                done.append(self._completed.get_nowait())
+            except queue.Empty:
+                return done
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self._process(job)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job: TranscriptionJob | SegmentsJob) -> None:
+        if isinstance(job, SegmentsJob):
+            self._process_segments(job)
+            return
+        job.state = RUNNING
+        try:
+            transcribe = job.transcribe or self.transcribe
+            raw_text, clean_text = transcribe(job.wav_path)
+            atomic_write_text(job.raw_path, raw_text)
+            atomic_write_text(job.clean_path, clean_text)
+        except Exception as exc:
+            job.error = str(exc)
+            job.state = FAILED
+            self.logger.error("TRANSCRIBE failed: step=%s error=%s", job.step_id, exc)
+        else:
+            job.raw_text = raw_text
+            job.clean_text = clean_text
+            job.state = DONE
+        self._store(job)
+        self._completed.put(job)
+
+    def _process_segments(self, job: SegmentsJob) -> None:
+        job.state = RUNNING
+        try:
+            job.segments = job.transcribe(job.wav_path)
+        except Exception as exc:
+            job.error = str(exc)
+            job.state = FAILED
+            self.logger.error("TRANSCRIBE failed: file=%s error=%s", job.wav_path.name, exc)
+        else:
+            job.state = DONE
+        self._store(job)
+        self._completed.put(job)
+
+    def _store(self, job: TranscriptionJob | SegmentsJob) -> None:
+        stored = job.wav_path
+        if job.store is not None:
+            try:
+                stored = job.store(job.wav_path)
+            except Exception as exc:
+                self.logger.error("AUDIO store failed: file=%s error=%s", job.wav_path.name, exc)
+        job.audio_path = stored if stored.exists() else None
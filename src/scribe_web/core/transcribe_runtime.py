@@ -1,21 +1,121 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
+from typing import Any
 
-_WHISPER_MODEL = None
+from scribe_web.core.asr_models import MODELS
+from scribe_web.core.blobs import file_digest
+from scribe_web.core.pcm import SAMPLE_RATE, pcm_digest, read_pcm16, to_float32
+from scribe_web.core.transcript_cache import CACHE, RUNTIME_KEYS, cache_key
 
 
-def transcribe_pl_optional(in_wav: Path) -> tuple[str, str]:
+def _cache_key(digest: str, vad: dict | None, **extra: Any) -> str:
+    asr = {key: value for key, value in MODELS.settings.items() if key not in RUNTIME_KEYS}
+    return cache_key(digest, MODELS.model_key(), {"asr": asr, "vad": vad, **extra})
+
+
+def _load_pcm(in_wav: Path) -> tuple[Any, int]:
     try:
-        import whisper
-    except ModuleNotFoundError:
-        return "", ""
+        return read_pcm16(in_wav)
+    except (RuntimeError, OSError):
+        # Format, którego libsndfile nie czyta: zostaje dekodowanie przez model (ffmpeg).
+        return None, 0
+
+
+def _run_asr(in_wav: Path, pcm: Any, samplerate: int, vad: dict | None) -> str:
+    if pcm is None or samplerate != SAMPLE_RATE:
+        return _run_asr_file(in_wav, vad)
+    audio = to_float32(pcm)
+    if vad is not None:
+        from scribe_web.core.audio_post import trim_silence
+
+        audio, segments = trim_silence(audio, samplerate, vad, in_wav)
+        if not segments:
+            return ""
+    return MODELS.transcribe(audio)
+
+
+def _run_asr_file(in_wav: Path, vad: dict | None) -> str:
+    if vad is None:
+        return MODELS.transcribe(in_wav)
+
+    from scribe_web.core.audio_post import trim_silence_wav
+
+    compact, _segments = trim_silence_wav(in_wav, vad)
+    if compact is None:
+        return ""
+    try:
+        return MODELS.transcribe(compact)
+    finally:
+        compact.unlink(missing_ok=True)
 
-    global _WHISPER_MODEL
-    if _WHISPER_MODEL is None:
-        _WHISPER_MODEL = whisper.load_model("base")
 
-    result = _WHISPER_MODEL.transcribe(str(in_wav), language="pl")
-    raw_text = (result.get("text") or "").strip()
+def transcribe_speech(in_wav: Path, vad: dict | None = None, pcm: Any = None) -> str:
+    """`pcm`: próbki int16 16 kHz z nagrania; bez nich czytamy `in_wav`."""
+    samplerate = SAMPLE_RATE
+    if pcm is None:
+        pcm, samplerate = _load_pcm(in_wav)
+    key = None
+    if CACHE.enabled():
+        key = _cache_key(pcm_digest(pcm) if pcm is not None else file_digest(in_wav), vad)
+        cached = CACHE.get(key)
+        if cached is not None:
+            return cached
+    text = _run_asr(in_wav, pcm, samplerate, vad)
+    if key is not None:
+        CACHE.put(key, text)
+    return text
+
+
+def transcribe_pl_optional(
+    in_wav: Path,
+    vad: dict | None = None,
+    pcm: Any = None,
+) -> tuple[str, str]:
+    if not MODELS.available():
+        return "", ""
+
+    raw_text = transcribe_speech(in_wav, vad, pcm)
     clean_text = raw_text
     return raw_text, clean_text
+
+
+def _run_segments(in_wav: Path, pcm: Any, samplerate: int, vad: dict | None) -> list[dict]:
+    if pcm is None or samplerate != SAMPLE_RATE:
+        # Bez próbek w pamięci nie ma czym wyciąć ciszy; czasy są wtedy od razu czasami pliku.
+        return MODELS.transcribe_segments(in_wav)
+    audio = to_float32(pcm)
+    if vad is None:
+        return MODELS.transcribe_segments(audio)
+
+    from scribe_web.core.audio_post import trim_silence
+    from scribe_web.core.vad import map_to_source
+
+    compact, time_map = trim_silence(audio, samplerate, vad, in_wav)
+    if not time_map:
+        return []
+    return [
+        {
+            **seg,
+            "start": round(map_to_source(seg["start"], time_map), 3),
+            "end": round(map_to_source(seg["end"], time_map), 3),
+        }
+        for seg in MODELS.transcribe_segments(compact)
+    ]
+
+
+def transcribe_segments(in_wav: Path, vad: dict | None = None) -> list[dict]:
+    """Jedno przejście ASR po całym nagraniu: odcinki {"start", "end", "text"} w sekundach pliku."""
+    pcm, samplerate = _load_pcm(in_wav)
+    key = None
+    if CACHE.enabled():
+        digest = pcm_digest(pcm) if pcm is not None else file_digest(in_wav)
+        key = _cache_key(digest, vad, segments=True)
+        cached = CACHE.get(key)
+        if cached is not None:
+            return json.loads(cached)
+    segments = [seg for seg in _run_segments(in_wav, pcm, samplerate, vad) if seg["text"]]
+    if key is not None:
+        CACHE.put(key, json.dumps(segments, ensure_ascii=False))
+    return segments
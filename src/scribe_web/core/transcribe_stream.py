@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import logging
+import queue
+import tempfile
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from scribe_web.core.pcm import SAMPLE_RATE
+from scribe_web.core.vad import UtteranceSegmenter
+
+_STOP = object()
+
+
+class StreamingTranscriber:
+    """Transkrybuje wypowiedzi w trakcie nagrania i dopisuje je do _raw.txt."""
+
+    def __init__(
+        self,
+        raw_path: Path,
+        samplerate: int,
+        transcribe: Callable[[Path | Any], str],
+        vad: dict | None = None,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.raw_path = raw_path
+        self.samplerate = samplerate
+        self.transcribe = transcribe
+        self.logger = logger or logging.getLogger("scribe_web")
+        self.segmenter = UtteranceSegmenter(samplerate, vad)
+        self.parts: list[str] = []
+        self.utterances = 0
+        self._tmp_dir: Path | None = None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="scribe-stream-asr", daemon=True)
+        raw_path.parent.mkdir(parents=True, exist_ok=True)
+        raw_path.write_text("", encoding="utf-8")
+        self._thread.start()
+
+    def feed(self, block: Any) -> None:
+        for utterance in self.segmenter.feed(block):
+            self._queue.put(utterance)
+
+    def finish(self) -> str:
+        last = self.segmenter.flush()
+        if last is not None:
+            self._queue.put(last)
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._tmp_dir is not None:
+            try:
+                self._tmp_dir.rmdir()
+            except OSError:
+                pass
+        return " ".join(self.parts).strip()
+
+    def _run(self) -> None:
+        while True:
+            utterance = self._queue.get()
+            if utterance is _STOP:
+                return
+            try:
+                text = self._transcribe_utterance(utterance)
+            except Exception as exc:
+                self.logger.error("STREAM transcribe failed: %s", exc)
+                continue
+            if not text:
+                continue
+            self.parts.append(text)
+            with self.raw_path.open("a", encoding="utf-8") as fh:
+                fh.write(text + "\n")
+
+    def _transcribe_utterance(self, utterance: Any) -> str:
+        self.utterances += 1
+        if self.samplerate == SAMPLE_RATE:
+            return self.transcribe(utterance).strip()
+
+        import soundfile as sf
+
+        if self._tmp_dir is None:
+            self._tmp_dir = Path(tempfile.mkdtemp(prefix="scribe_stream_"))
+        wav = self._tmp_dir / f"utt_{self.utterances:04d}.wav"
+        sf.write(str(wav), utterance, self.samplerate)
+        try:
+            return self.transcribe(wav).strip()
+        finally:
+            wav.unlink(missing_ok=True)
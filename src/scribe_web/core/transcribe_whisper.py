@@ -1,20 +1,13 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Any
 
-import whisper
+from scribe_web.core.asr_models import MODELS
+from scribe_web.core.transcribe_runtime import transcribe_speech
 
-_MODEL = None
 
-
-def _get_model() -> whisper.Whisper:
-    global _MODEL
-    if _MODEL is None:
-        _MODEL = whisper.load_model("base")
-    return _MODEL
-
-
-def transcribe_pl(in_wav: Path) -> str:
-    model = _get_model()
-    result = model.transcribe(str(in_wav), language="pl")
-    return result["text"].strip()
+def transcribe_pl(in_wav: Path, vad: dict | None = None, pcm: Any = None) -> str:
+    if not MODELS.available():
+        raise ModuleNotFoundError("No ASR backend installed (whisper/faster-whisper/vosk)")
+    return transcribe_speech(in_wav, vad, pcm)
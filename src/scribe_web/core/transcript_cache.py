@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from scribe_web.core.paths import sessions_root
+
+CACHE_DIRNAME = "_cache"
+CACHE_FILENAME = "transcripts.sqlite3"
+
+DEFAULT_TRANSCRIPT_CACHE = {
+    "enabled": True,
+    "max_mb": 64,
+}
+
+# Ustawienia ASR, które nie wpływają na wynik transkrypcji.
+RUNTIME_KEYS = ("warmup", "idle_unload_s")
+
+
+def cache_key(digest: str, model_key: str, options: dict) -> str:
+    encoded = json.dumps(options, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{digest}|{model_key}|{encoded}".encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """Trwały cache transkrypcji (SQLite), z wyrzucaniem najdawniej używanych wpisów."""
+
+    def __init__(self) -> None:
+        self.path: Path | None = None
+        self.max_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger("scribe_web")
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def configure(self, config: dict) -> None:
+        settings = dict(DEFAULT_TRANSCRIPT_CACHE)
+        settings.update(config.get("transcript_cache", {}))
+        path = None
+        if settings.get("enabled"):
+            path = sessions_root(config) / CACHE_DIRNAME / CACHE_FILENAME
+        with self._lock:
+            if path != self.path:
+                self._close_locked()
+                self.path = path
+            self.max_bytes = int(float(settings.get("max_mb") or 0) * 1024 * 1024)
+
+    def enabled(self) -> bool:
+        return self.path is not None and self.max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Kilka procesów (--retranscribe) może pisać naraz; WAL + timeout to wystarcza.
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS transcripts_last_used ON transcripts(last_used)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> str | None:
+        if not self.enabled():
+            return None
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT text FROM transcripts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key)
+                    )
+                    conn.commit()
+            except sqlite3.Error as exc:
+                self.logger.error("TRANSCRIPT_CACHE read failed: %s", exc)
+                return None
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self.logger.info(
+                "TRANSCRIPT_CACHE %s: key=%s hits=%s misses=%s",
+                "hit" if row is not None else "miss",
+                key[:12],
+                self.hits,
+                self.misses,
+            )
+            return row[0] if row is not None else None
+
+    def put(self, key: str, text: str) -> None:
+        if not self.enabled():
+            return
+        size = len(text.encode("utf-8")) + len(key)
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO transcripts (key, text, size, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, text, size, now, now),
+                )
+                evicted = self._evict_locked(conn)
+                conn.commit()
+            except sqlite3.Error as exc:
+                self.logger.error("TRANSCRIPT_CACHE write failed: %s", exc)
+                return
+        if evicted:
+            self.logger.info("TRANSCRIPT_CACHE evicted: entries=%s", evicted)
+
+    def _evict_locked(self, conn: sqlite3.Connection) -> int:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        rows = conn.execute("SELECT key, size FROM transcripts ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        return evicted
+
+    def stats(self) -> dict:
+        stats = {"hits": self.hits, "misses": self.misses, "entries": 0, "bytes": 0}
+        if not self.enabled():
+            return stats
+        with self._lock:
+            try:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+                ).fetchone()
+            except sqlite3.Error:
+                return stats
+        stats.update(entries=entries, bytes=size)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+CACHE = TranscriptCache()
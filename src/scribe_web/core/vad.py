@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+
+import numpy as np
+
+DEFAULT_VAD = {
+    "frame_ms": 30,
+    "threshold": 0.01,
+    "noise_ratio": 3.0,
+    "min_silence_s": 0.6,
+    "max_utterance_s": 20.0,
+    "preroll_s": 0.2,
+    "pad_s": 0.15,
+    "max_gap_s": 0.5,
+}
+
+
+def vad_settings(config: dict) -> dict:
+    settings = dict(DEFAULT_VAD)
+    settings.update(config.get("vad", {}))
+    return settings
+
+
+def to_mono(audio: np.ndarray) -> np.ndarray:
+    if audio.ndim == 2:
+        return audio.mean(axis=1, dtype=np.float32)
+    return audio.astype(np.float32, copy=False)
+
+
+def frame_rms(mono: np.ndarray, frame_len: int) -> np.ndarray:
+    n = len(mono) // frame_len
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = mono[: n * frame_len].reshape(n, frame_len)
+    return np.sqrt(np.mean(np.square(frames), axis=1))
+
+
+class UtteranceSegmenter:
+    """Tnie strumień audio na wypowiedzi po dłuższej ciszy (energetyczny VAD)."""
+
+    def __init__(self, samplerate: int, settings: dict | None = None) -> None:
+        s = dict(DEFAULT_VAD)
+        s.update(settings or {})
+        self.frame_len = max(1, int(samplerate * s["frame_ms"] / 1000))
+        self.threshold = float(s["threshold"])
+        self.noise_ratio = float(s["noise_ratio"])
+        self.min_silence = max(1, int(s["min_silence_s"] * 1000 / s["frame_ms"]))
+        self.max_frames = max(1, int(s["max_utterance_s"] * 1000 / s["frame_ms"]))
+        preroll = max(1, int(s["preroll_s"] * 1000 / s["frame_ms"]))
+        self._preroll: deque[np.ndarray] = deque(maxlen=preroll)
+        self._rest = np.zeros(0, dtype=np.float32)
+        self._frames: list[np.ndarray] = []
+        self._silence = 0
+        self._noise = self.threshold / self.noise_ratio
+
+    def _is_speech(self, rms: float) -> bool:
+        speech = rms > max(self.threshold, self._noise * self.noise_ratio)
+        if not speech:
+            self._noise = 0.95 * self._noise + 0.05 * rms
+        return speech
+
+    def feed(self, block: np.ndarray) -> Iterator[np.ndarray]:
+        mono = np.concatenate([self._rest, to_mono(block)])
+        rms = frame_rms(mono, self.frame_len)
+        used = len(rms) * self.frame_len
+        self._rest = mono[used:]
+        for i, value in enumerate(rms):
+            frame = mono[i * self.frame_len : (i + 1) * self.frame_len]
+            speech = self._is_speech(float(value))
+            if not self._frames:
+                if speech:
+                    self._frames = [*self._preroll, frame]
+                    self._preroll.clear()
+                    self._silence = 0
+                else:
+                    self._preroll.append(frame)
+                continue
+            self._frames.append(frame)
+            self._silence = 0 if speech else self._silence + 1
+            if self._silence >= self.min_silence or len(self._frames) >= self.max_frames:
+                yield self._emit()
+
+    def _emit(self) -> np.ndarray:
+        utterance = np.concatenate(self._frames)
+        self._frames = []
+        self._silence = 0
+        return utterance
+
+    def flush(self) -> np.ndarray | None:
+        if self._frames:
+            self._frames.append(self._rest)
+            self._rest = np.zeros(0, dtype=np.float32)
+            return self._emit()
+        return None
+
+
+def speech_mask(mono: np.ndarray, samplerate: int, settings: dict | None = None) -> np.ndarray:
+    s = dict(DEFAULT_VAD)
+    s.update(settings or {})
+    frame_len = max(1, int(samplerate * s["frame_ms"] / 1000))
+    rms = frame_rms(mono, frame_len)
+    if len(rms) == 0:
+        return np.zeros(0, dtype=bool)
+    noise = float(np.percentile(rms, 10))
+    mask = rms > max(float(s["threshold"]), noise * float(s["noise_ratio"]))
+    pad = int(s["pad_s"] * 1000 / s["frame_ms"])
+    if pad > 0 and mask.any():
+        # Poszerzenie mowy o margines: splot zamiast pętli po ramkach.
+        kernel = np.ones(2 * pad + 1, dtype=np.int32)
+        mask = np.convolve(mask.astype(np.int32), kernel, mode="same") > 0
+    return mask
+
+
+def speech_regions(
+    mono: np.ndarray,
+    samplerate: int,
+    settings: dict | None = None,
+) -> list[tuple[int, int]]:
+    s = dict(DEFAULT_VAD)
+    s.update(settings or {})
+    frame_len = max(1, int(samplerate * s["frame_ms"] / 1000))
+    mask = speech_mask(mono, samplerate, s)
+    if not mask.any():
+        return []
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1) * frame_len
+    ends = np.minimum(np.flatnonzero(edges == -1) * frame_len, len(mono))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def compress_silence(
+    audio: np.ndarray,
+    samplerate: int,
+    settings: dict | None = None,
+) -> tuple[np.ndarray, list[dict]]:
+    """Wycina ciszę z początku i końca, długie przerwy skraca do max_gap_s.
+
+    Zwraca skompresowane audio i mapę odcinków {"src", "dst", "dur"} (sekundy)
+    pozwalającą przeliczyć czas w skompresowanym nagraniu na czas w oryginale.
+    """
+    s = dict(DEFAULT_VAD)
+    s.update(settings or {})
+    mono = to_mono(audio)
+    regions = speech_regions(mono, samplerate, s)
+    if not regions:
+        return mono[:0], []
+    max_gap = int(float(s["max_gap_s"]) * samplerate)
+    pieces: list[np.ndarray] = []
+    segments: list[dict] = []
+    dst = 0
+    prev_end: int | None = None
+    for start, end in regions:
+        if prev_end is not None:
+            gap = min(start - prev_end, max_gap)
+            pieces.append(mono[prev_end : prev_end + gap])
+            dst += gap
+        pieces.append(mono[start:end])
+        segments.append(
+            {
+                "src": round(start / samplerate, 3),
+                "dst": round(dst / samplerate, 3),
+                "dur": round((end - start) / samplerate, 3),
+            }
+        )
+        dst += end - start
+        prev_end = end
+    return np.concatenate(pieces), segments
+
+
+def map_to_source(t: float, segments: list[dict]) -> float:
+    for seg in reversed(segments):
+        if t >= seg["dst"]:
+            return seg["src"] + min(t - seg["dst"], seg["dur"])
+    return t
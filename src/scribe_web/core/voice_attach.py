@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import threading
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
-from scribe_web.core.session import SessionContext
-from scribe_web.core.utils import atomic_write_json
+from scribe_web.core.session import SessionContext, update_step
+from scribe_web.core.voice_runtime import VoiceState, start_timed_recording
 
 
 def _write_text(path: Path, text: str) -> None:
@@ -42,14 +45,27 @@ def attach_voice_to_last_step(
     if seconds_note is not None:
         step_text["voice_seconds"] = seconds_note
 
-    atomic_write_json(ctx.payload_path, ctx.payload)
+    update_step(ctx, step, "voice")
 
     return {"wav": wav_rel, "raw": raw_rel, "clean": clean_rel}
 
 
-def record_and_attach_to_last_step(ctx: SessionContext, seconds: int = 20) -> dict:
-    from scribe_web.core.audio_recorder import record_wav
-    from scribe_web.core.transcribe_whisper import transcribe_pl
+def record_and_attach_to_last_step(
+    ctx: SessionContext,
+    seconds: int = 20,
+    vad: dict | None = None,
+    state: VoiceState | None = None,
+    review: Callable[[str], str | None] | None = None,
+    on_done: Callable[[dict], None] | None = None,
+    storage_format: str = "wav",
+) -> dict:
+    """Startuje nagranie i wraca od razu; transkrypcja rusza po `seconds` albo po `stop`.
+
+    `review(raw)` może zwrócić poprawiony tekst (None/"" = zostaw raw), `on_done`
+    dostaje wynik po zapisaniu plików. Oba wołane są z wątku nagrania. Po transkrypcji
+    nagranie jest zapisywane w `storage_format` (jak `voice.storage_format`).
+    """
+    from scribe_web.core.audio_post import stored_audio_path
 
     step = _select_step(ctx, None)
     step_id = step["id"]
@@ -57,29 +73,38 @@ def record_and_attach_to_last_step(ctx: SessionContext, seconds: int = 20) -> di
     wav_rel = f"transcripts/step_{step_id:03d}.wav"
     raw_rel = f"transcripts/step_{step_id:03d}_raw.txt"
     clean_rel = f"transcripts/step_{step_id:03d}_clean.txt"
-
-    wav_abs = ctx.session_dir / wav_rel
-    record_wav(wav_abs, seconds=seconds)
-
-    raw_text = transcribe_pl(wav_abs)
-    raw_abs = ctx.session_dir / raw_rel
-    _write_text(raw_abs, raw_text)
-
-    clean_text = raw_text
-    print("--- TRANSKRYPCJA RAW ---")
-    print(raw_text)
-    print("--- KONIEC RAW ---")
-    user_text = input("Wklej poprawiony tekst (Enter = zostaw bez zmian): ").strip()
-    if user_text:
-        clean_text = user_text
-
-    clean_abs = ctx.session_dir / clean_rel
-    _write_text(clean_abs, clean_text)
-
-    step_text = step.setdefault("text", {})
-    step_text["voice_transcript_raw"] = raw_rel
-    step_text["voice_transcript_clean"] = clean_rel
-
-    atomic_write_json(ctx.payload_path, ctx.payload)
-
-    return {"wav": wav_rel, "raw": raw_rel, "clean": clean_rel}
+    audio_rel = f"transcripts/{stored_audio_path(Path(wav_rel), storage_format).name}"
+    result = {"audio": audio_rel, "raw": raw_rel, "clean": clean_rel}
+    done = threading.Event()
+
+    def complete(wav_abs: Path, pcm: Any) -> None:
+        from scribe_web.core.audio_post import compress_audio
+        from scribe_web.core.transcribe_whisper import transcribe_pl
+
+        try:
+            raw_text = transcribe_pl(wav_abs, vad, pcm)
+            _write_text(ctx.session_dir / raw_rel, raw_text)
+            clean_text = raw_text
+            if review is not None:
+                clean_text = review(raw_text) or raw_text
+            _write_text(ctx.session_dir / clean_rel, clean_text)
+            stored = compress_audio(wav_abs, storage_format) if wav_abs.exists() else wav_abs
+            # Ścieżki trafiają do payloadu dopiero, gdy pliki istnieją.
+            if stored.exists():
+                step.setdefault("assets", {})["voice"] = f"transcripts/{stored.name}"
+            step_text = step.setdefault("text", {})
+            step_text["voice_transcript_raw"] = raw_rel
+            step_text["voice_transcript_clean"] = clean_rel
+            update_step(ctx, step, "voice")
+            if on_done is not None:
+                on_done(result)
+        finally:
+            done.set()
+
+    stop = start_timed_recording(
+        state or VoiceState(),
+        ctx.session_dir / wav_rel,
+        seconds,
+        on_complete=complete,
+    )
+    return {**result, "stop": stop, "done": done}
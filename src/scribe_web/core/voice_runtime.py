@@ -1,52 +1,246 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
+from scribe_web.core.pcm import to_pcm16
+
+
+class StreamingWavWriter:
+    """Callback audio wkłada bloki do stałego bufora pierścieniowego, wątek zapisuje je na dysk."""
+
+    def __init__(
+        self,
+        out_path: Path,
+        samplerate: int,
+        channels: int,
+        ring_seconds: float = 10.0,
+        on_audio: Callable[[Any], None] | None = None,
+        keep_pcm: bool = True,
+        max_pcm_seconds: float = 120.0,
+    ) -> None:
+        import numpy as np
+        import soundfile as sf
+
+        self.out_path = out_path
+        self.tmp_path = out_path.with_name(f".{out_path.name}.part")
+        self.capacity = max(1, int(ring_seconds * samplerate))
+        self.ring = np.zeros((self.capacity, channels), dtype=np.float32)
+        self.written = 0
+        self.read = 0
+        self.dropped = 0
+        self.on_audio = on_audio
+        # Kopia próbek int16 w pamięci: ASR dostaje je od razu, bez czytania WAV z dysku.
+        # Tylko do `max_pcm_seconds`; dłuższe nagranie ASR czyta z pliku.
+        self.keep_pcm = keep_pcm
+        self.max_pcm_frames = int(max_pcm_seconds * samplerate)
+        self._pcm_chunks: list[Any] = []
+        self._pcm_frames = 0
+        self._stop = False
+        self._ready = threading.Event()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = sf.SoundFile(
+            str(self.tmp_path),
+            mode="w",
+            samplerate=samplerate,
+            channels=channels,
+            format="WAV",
+            subtype="PCM_16",
+        )
+        self._thread = threading.Thread(target=self._run, name="scribe-wav", daemon=True)
+        self._thread.start()
+
+    def push(self, block: Any) -> None:
+        n = len(block)
+        if n == 0:
+            return
+        if self.written - self.read + n > self.capacity:
+            # Dysk nie nadąża: gubimy blok zamiast blokować wątek audio.
+            self.dropped += n
+            return
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.ring[start : start + first] = block[:first]
+        if first < n:
+            self.ring[: n - first] = block[first:]
+        self.written += n
+        self._ready.set()
+
+    def _drain(self) -> None:
+        end = self.written
+        while self.read < end:
+            start = self.read % self.capacity
+            count = min(end - self.read, self.capacity - start)
+            chunk = self.ring[start : start + count]
+            pcm = to_pcm16(chunk)
+            self._file.write(pcm)
+            if self.keep_pcm:
+                self._keep(pcm[:, 0])
+            if self.on_audio is not None:
+                try:
+                    self.on_audio(chunk)
+                except Exception as exc:
+                    logging.getLogger("scribe_web").error("VOICE on_audio failed: %s", exc)
+                    self.on_audio = None
+            self.read += count
+
+    def _keep(self, samples: Any) -> None:
+        self._pcm_frames += len(samples)
+        if self._pcm_frames > self.max_pcm_frames:
+            self.keep_pcm = False
+            self._pcm_chunks = []
+            return
+        self._pcm_chunks.append(samples.copy())
+
+    def _run(self) -> None:
+        while True:
+            self._ready.wait(0.1)
+            self._ready.clear()
+            self._drain()
+            if self._stop and self.read == self.written:
+                return
+
+    def close(self) -> int:
+        self._stop = True
+        self._ready.set()
+        self._thread.join()
+        frames = self._file.frames
+        self._file.close()
+        self.tmp_path.replace(self.out_path)
+        return frames
+
+    def pcm(self) -> Any:
+        import numpy as np
+
+        if not self._pcm_chunks:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(self._pcm_chunks)
+
 
 @dataclass
 class VoiceState:
     recording: bool = False
     step_id: int | None = None
     stream: Any = None
-    buffer: list[Any] = field(default_factory=list)
+    writer: StreamingWavWriter | None = None
+    out_wav: Path | None = None
     samplerate: int = 16000
     channels: int = 1
+    ring_seconds: float = 10.0
+    on_audio: Callable[[Any], None] | None = None
+    keep_pcm: bool = True
+    max_pcm_seconds: float = 120.0
+    stop_event: threading.Event | None = None
+    timer: threading.Thread | None = None
 
 
-def start_recording(state: VoiceState) -> None:
+def start_recording(state: VoiceState, out_wav: Path) -> None:
     import sounddevice as sd
 
-    state.buffer = []
-
-    def callback(indata, _frames, _time, _status):
-        state.buffer.append(indata.copy())
-
-    state.stream = sd.InputStream(
+    state.out_wav = out_wav
+    state.writer = StreamingWavWriter(
+        out_wav,
         samplerate=state.samplerate,
         channels=state.channels,
-        callback=callback,
+        ring_seconds=state.ring_seconds,
+        on_audio=state.on_audio,
+        keep_pcm=state.keep_pcm,
+        max_pcm_seconds=state.max_pcm_seconds,
     )
-    state.stream.start()
+    writer = state.writer
+
+    def callback(indata, _frames, _time, _status):
+        writer.push(indata)
+
+    try:
+        state.stream = sd.InputStream(
+            samplerate=state.samplerate,
+            channels=state.channels,
+            dtype="float32",
+            callback=callback,
+        )
+        state.stream.start()
+    except Exception:
+        writer.close()
+        state.writer = None
+        state.stream = None
+        raise
     state.recording = True
 
 
-def stop_and_save_wav(state: VoiceState, out_wav) -> None:
-    import numpy as np
-    import soundfile as sf
+def recording_position(state: VoiceState) -> float | None:
+    """Sekunda pliku WAV, do której dotarło nagranie (zgubione bloki nie przesuwają czasu)."""
+    if state.writer is None:
+        return None
+    return state.writer.written / state.samplerate
+
+
+def stop_and_save_wav(state: VoiceState, out_wav) -> Any:
+    """Zamyka nagranie i zwraca jego próbki int16 (mono, 16 kHz) albo None (ponad limit)."""
+    import shutil
 
     if state.stream is not None:
         state.stream.stop()
         state.stream.close()
         state.stream = None
 
-    if state.buffer:
-        audio = np.concatenate(state.buffer, axis=0)
-    else:
-        audio = np.zeros((0, state.channels), dtype=np.float32)
+    pcm = None
+    if state.writer is not None:
+        state.writer.close()
+        pcm = state.writer.pcm() if state.writer.keep_pcm else None
+        state.writer = None
 
-    out_wav.parent.mkdir(parents=True, exist_ok=True)
-    sf.write(out_wav, audio, state.samplerate)
+    out_wav = Path(out_wav)
+    if state.out_wav is not None and state.out_wav != out_wav:
+        out_wav.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(state.out_wav), str(out_wav))
 
-    state.buffer = []
+    state.out_wav = None
     state.recording = False
+    return pcm
+
+
+def start_timed_recording(
+    state: VoiceState,
+    out_wav: Path,
+    seconds: float,
+    on_complete: Callable[[Path, Any], None] | None = None,
+) -> threading.Event:
+    """Nagrywa w tle najwyżej `seconds`; ustawienie zwróconego eventu kończy wcześniej."""
+    start_recording(state, out_wav)
+    stop_event = threading.Event()
+    logger = logging.getLogger("scribe_web")
+
+    def run() -> None:
+        stop_event.wait(seconds)
+        try:
+            pcm = stop_and_save_wav(state, out_wav)
+        except Exception as exc:
+            logger.error("VOICE timed stop failed: %s", exc)
+            return
+        finally:
+            if state.stop_event is stop_event:
+                state.stop_event = None
+                state.timer = None
+        if on_complete is not None:
+            try:
+                on_complete(out_wav, pcm)
+            except Exception as exc:
+                logger.error("VOICE on_complete failed: %s", exc)
+
+    state.stop_event = stop_event
+    state.timer = threading.Thread(target=run, name="scribe-voice-timer", daemon=True)
+    state.timer.start()
+    return stop_event
+
+
+def stop_timed_recording(state: VoiceState, wait: bool = True) -> None:
+    timer = state.timer
+    if state.stop_event is not None:
+        state.stop_event.set()
+    if wait and timer is not None and timer is not threading.current_thread():
+        timer.join()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import os
+
+
+def cursor_position() -> tuple[int, int] | None:
+    try:
+        import Quartz
+    except ModuleNotFoundError:
+        Quartz = None
+    if Quartz is not None:
+        loc = Quartz.CGEventGetLocation(Quartz.CGEventCreate(None))
+        return int(loc.x), int(loc.y)
+    try:
+        from pynput.mouse import Controller as MouseController
+    except ModuleNotFoundError:
+        return None
+    x, y = MouseController().position
+    return int(x), int(y)
+
+
+def window_rect_at(x: int, y: int) -> dict | None:
+    try:
+        import Quartz
+    except ModuleNotFoundError:
+        return None
+
+    options = Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements
+    windows = Quartz.CGWindowListCopyWindowInfo(options, Quartz.kCGNullWindowID) or []
+    own_pid = os.getpid()
+    # Lista jest od najwyższego okna; pomijamy panel SCRIBE i warstwy systemowe (menu, dock).
+    for info in windows:
+        if info.get("kCGWindowOwnerPID") == own_pid:
+            continue
+        if info.get("kCGWindowLayer", 0) != 0:
+            continue
+        bounds = info.get("kCGWindowBounds") or {}
+        left = int(bounds.get("X", 0))
+        top = int(bounds.get("Y", 0))
+        width = int(bounds.get("Width", 0))
+        height = int(bounds.get("Height", 0))
+        if width <= 0 or height <= 0:
+            continue
+        if left <= x < left + width and top <= y < top + height:
+            return {"left": left, "top": top, "width": width, "height": height}
+    return None
@@ -10,7 +10,7 @@ from scribe_web.core.constants import DEFAULT_CONFIG_PATH, PAYLOAD_FILENAME
 from scribe_web.core.logging_setup import setup_logging
 from scribe_web.core.paths import ensure_dirs, logs_root, repo_root, sessions_root
 from scribe_web.core.payload_v1 import build_payload, build_step
-from scribe_web.core.session import add_step, create_session
+from scribe_web.core.session import add_step, compact_session, create_session
 
 
 def run_smoke_test() -> Path:
@@ -42,8 +42,140 @@ def main() -> None:
     parser.add_argument("--demo", action="store_true", help="Create demo session with sample steps")
     parser.add_argument("--voice-demo", action="store_true", help="Record voice and attach to last step")
     parser.add_argument("--panel", action="store_true", help="Run always-on-top control panel")
+    parser.add_argument(
+        "--retranscribe",
+        nargs="+",
+        metavar="SESSION",
+        help="Re-run transcription for session dirs (names under sessions/ or paths)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Measure cold panel startup (time to first paint, slowest imports)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run long-lived SCRIBE daemon (panel + local HTTP API)",
+    )
+    parser.add_argument("--headless", action="store_true", help="With --daemon: no panel window")
+    parser.add_argument(
+        "--send",
+        nargs="+",
+        metavar="COMMAND",
+        help="Send to running daemon: start [project], step, annotate, voice, pause, undo, end, "
+        "status, quit",
+    )
+    parser.add_argument(
+        "--catalog",
+        choices=("refresh", "rebuild", "list", "stats"),
+        help="Session catalog: refresh changed sessions, rebuild all, list sessions, show stats",
+    )
+    parser.add_argument(
+        "--search",
+        nargs="+",
+        metavar="WORD",
+        help="Full-text search over step titles, URLs, notes and transcripts in all sessions",
+    )
+    parser.add_argument(
+        "--similar",
+        metavar="IMAGE|SESSION:STEP",
+        help="Find steps in all sessions whose screenshot looks like the image or step",
+    )
     args = parser.parse_args()
 
+    if args.send:
+        from scribe_web.core.daemon_client import COMMANDS, DaemonError, call
+
+        config = load_config(repo_root() / DEFAULT_CONFIG_PATH)
+        command, rest = args.send[0], args.send[1:]
+        if command not in COMMANDS:
+            print(f"Nieznana komenda: {command} (dostępne: {', '.join(COMMANDS)})")
+            sys.exit(2)
+        params = {"project": " ".join(rest)} if command == "start" and rest else {}
+        try:
+            result = call(config, command, params)
+        except DaemonError as exc:
+            print(f"BŁĄD: {exc}")
+            sys.exit(1)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    if args.daemon:
+        from scribe_web.ui.daemon import DaemonError, run_daemon
+
+        config = load_config(repo_root() / DEFAULT_CONFIG_PATH)
+        try:
+            run_daemon(config, panel=not args.headless)
+        except DaemonError as exc:
+            print(f"BŁĄD: {exc}")
+            sys.exit(1)
+        return
+    if args.profile_startup:
+        from scribe_web.core.startup_profile import format_report, profile_startup
+
+        config = load_config(repo_root() / DEFAULT_CONFIG_PATH)
+        logs_dir = logs_root(config)
+        ensure_dirs([logs_dir])
+        logger = setup_logging(logs_dir / "scribe_web.log")
+        result = profile_startup()
+        logger.info(
+            "PROFILE startup: painted_ms=%s wall_ms=%.0f imports=%s heavy=%s",
+            f"{result['painted_ms']:.0f}" if result["painted_ms"] is not None else "-",
+            result["wall_ms"],
+            len(result["imports"]),
+            ",".join(result["heavy"]) or "-",
+        )
+        print(format_report(result))
+        return
+    if args.catalog:
+        from scribe_web.core.catalog import CATALOG, format_sessions
+
+        config = load_config(repo_root() / DEFAULT_CONFIG_PATH)
+        logs_dir = logs_root(config)
+        ensure_dirs([logs_dir])
+        setup_logging(logs_dir / "scribe_web.log")
+        root = sessions_root(config)
+        summary = CATALOG.refresh(root, full=args.catalog == "rebuild")
+        if args.catalog == "list":
+            print(format_sessions(CATALOG.list_sessions(root)))
+        elif args.catalog == "stats":
+            print(json.dumps(CATALOG.stats(root), ensure_ascii=False, indent=2))
+        else:
+            print(
+                f"OK: catalog {args.catalog} indexed={summary['indexed']} "
+                f"skipped={summary['skipped']} removed={summary['removed']} ms={summary['ms']}"
+            )
+        return
+    if args.search:
+        from scribe_web.core.catalog import CATALOG, format_hits
+
+        config = load_config(repo_root() / DEFAULT_CONFIG_PATH)
+        logs_dir = logs_root(config)
+        ensure_dirs([logs_dir])
+        setup_logging(logs_dir / "scribe_web.log")
+        root = sessions_root(config)
+        CATALOG.refresh(root)
+        try:
+            hits = CATALOG.search(root, " ".join(args.search))
+        except RuntimeError as exc:
+            print(f"BŁĄD: {exc}")
+            sys.exit(1)
+        print(format_hits(hits) if hits else "Brak wyników.")
+        return
+    if args.similar:
+        config = load_config(repo_root() / DEFAULT_CONFIG_PATH)
+        logs_dir = logs_root(config)
+        ensure_dirs([logs_dir])
+        setup_logging(logs_dir / "scribe_web.log")
+        from scribe_web.core.screen_index import find_similar, format_similar
+
+        try:
+            hits = find_similar(config, args.similar)
+        except ValueError as exc:
+            print(f"BŁĄD: {exc}")
+            sys.exit(1)
+        print(format_similar(hits) if hits else "Brak podobnych kroków.")
+        return
     if args.panel:
         config_path = repo_root() / DEFAULT_CONFIG_PATH
         config = load_config(config_path)
@@ -51,6 +183,35 @@ def main() -> None:
 
         run_panel(config)
         return
+    if args.retranscribe:
+        config_path = repo_root() / DEFAULT_CONFIG_PATH
+        config = load_config(config_path)
+        logs_dir = logs_root(config)
+        ensure_dirs([logs_dir])
+        logger = setup_logging(logs_dir / "scribe_web.log")
+        from scribe_web.core.retranscribe import retranscribe_sessions
+
+        session_dirs = []
+        for name in args.retranscribe:
+            path = Path(name)
+            if not path.is_dir():
+                path = sessions_root(config) / name
+            if not path.is_dir():
+                print(f"Brak sesji: {name}")
+                sys.exit(1)
+            session_dirs.append(path)
+        vad = None
+        if config.get("voice", {}).get("trim_silence"):
+            from scribe_web.core.vad import vad_settings
+
+            vad = vad_settings(config)
+        summary = retranscribe_sessions(session_dirs, config, vad=vad, logger=logger)
+        print(
+            "OK: retranscribe complete "
+            f"sessions={summary['sessions']} transcribed={summary['transcribed']} "
+            f"skipped={summary['skipped']} failed={summary['failed']} workers={summary['workers']}"
+        )
+        return
     if args.smoke:
         payload_path = run_smoke_test()
         print("OK: smoke test complete")
@@ -79,6 +240,7 @@ def main() -> None:
                 "DEMO: tu pobieram dane i zapisuję je lokalnie.",
             ),
         )
+        compact_session(ctx)
         print("OK: demo session created")
         print(str(ctx.payload_path.resolve()))
         print(str(ctx.session_dir.resolve()))
@@ -90,15 +252,35 @@ def main() -> None:
         ctx = create_session(project_name, config)
         add_step(ctx, build_step(1, "", "", ""))
         try:
+            from scribe_web.core.asr_models import MODELS
+            from scribe_web.core.transcript_cache import CACHE
             from scribe_web.core.voice_attach import record_and_attach_to_last_step
         except ModuleNotFoundError as e:
             print(
                 "BRAK ZALEŻNOŚCI AUDIO: zainstaluj requirements.txt (sounddevice/soundfile/whisper)."
             )
             raise
-        result = record_and_attach_to_last_step(ctx, seconds=10)
+        MODELS.configure(config)
+        CACHE.configure(config)
+        MODELS.warm_up_async()
+
+        def review(raw_text: str) -> str:
+            print("--- TRANSKRYPCJA RAW ---")
+            print(raw_text)
+            print("--- KONIEC RAW ---")
+            return input("Wklej poprawiony tekst (Enter = zostaw bez zmian): ").strip()
+
+        result = record_and_attach_to_last_step(
+            ctx,
+            seconds=10,
+            review=review,
+            storage_format=config.get("voice", {}).get("storage_format", "wav"),
+        )
+        print("REC 10 s...")
+        result["done"].wait()
+        compact_session(ctx)
         print("OK: voice demo complete")
-        print(f"WAV: {result['wav']}")
+        print(f"AUDIO: {result['audio']}")
         print(f"RAW: {result['raw']}")
         print(f"CLEAN: {result['clean']}")
         print(str(ctx.payload_path.resolve()))
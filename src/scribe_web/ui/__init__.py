@@ -1,6 +1,28 @@
 """UI package for SCRIBE_WEB."""
 
-from scribe_web.ui.controller import Controller
-from scribe_web.ui.panel import run_panel
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scribe_web.ui.controller import Controller
+    from scribe_web.ui.panel import run_panel
 
 __all__ = ["Controller", "run_panel"]
+
+_LAZY = {
+    "Controller": "scribe_web.ui.controller",
+    "run_panel": "scribe_web.ui.panel",
+}
+
+
+def __getattr__(name: str):
+    # Import pakietu nie może ciągnąć tkinter ani kontrolera; ładujemy dopiero na żądanie.
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
@@ -6,6 +6,8 @@ import tkinter as tk
 
 from PIL import Image, ImageDraw, ImageTk
 
+from scribe_web.core.encoders import resolve_profile, save_image
+
 
 MAX_WIDTH = 1100
 MAX_HEIGHT = 800
@@ -23,6 +25,7 @@ def _open_annotator(
     output_png: Path,
     on_done: Callable[[bool], None] | None,
     blocking: bool,
+    profile: dict | None = None,
 ) -> bool:
     if not input_png.exists():
         if on_done:
@@ -102,8 +105,7 @@ def _open_annotator(
                 width=STROKE_WIDTH,
                 joint="round",
             )
-        output_png.parent.mkdir(parents=True, exist_ok=True)
-        original.save(output_png, format="PNG")
+        save_image(original, output_png, resolve_profile(profile))
         saved["ok"] = True
         root.destroy()
         if on_done:
@@ -135,9 +137,14 @@ def annotate_freehand(
     input_png: Path,
     output_png: Path,
     on_done: Callable[[bool], None] | None = None,
+    profile: dict | None = None,
 ) -> bool:
-    return _open_annotator(input_png, output_png, on_done, blocking=False)
+    return _open_annotator(input_png, output_png, on_done, blocking=False, profile=profile)
 
 
-def annotate_freehand_blocking(input_png: Path, output_png: Path) -> bool:
-    return _open_annotator(input_png, output_png, on_done=None, blocking=True)
+def annotate_freehand_blocking(
+    input_png: Path,
+    output_png: Path,
+    profile: dict | None = None,
+) -> bool:
+    return _open_annotator(input_png, output_png, on_done=None, blocking=True, profile=profile)
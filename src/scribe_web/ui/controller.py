@@ -1,20 +1,139 @@
 from __future__ import annotations
 
-import json
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
 from datetime import datetime
+from functools import partial, wraps
 from pathlib import Path
-import shutil
+from typing import TYPE_CHECKING
 
-from scribe_web.core.capture import capture_fullscreen_png
+from scribe_web.core.asr_models import MODELS
+from scribe_web.core.blobs import blobs_root, collect_garbage, detach, link_copy, store_file
+from scribe_web.core.capture_worker import CaptureWorker
+from scribe_web.core.catalog import CATALOG
+from scribe_web.core.constants import CAPTURE_MODES
 from scribe_web.core.payload_v1 import build_step
-from scribe_web.core.session import SessionContext, add_step, create_session
+from scribe_web.core.session import (
+    SessionContext,
+    add_step,
+    compact_session,
+    create_session,
+    maybe_compact,
+    undo_step,
+    update_step,
+)
+from scribe_web.core.session_track import TRACK_REL, apply_session_track
 from scribe_web.core.logging_setup import setup_logging
-from scribe_web.core.paths import ensure_dirs, logs_root
-from scribe_web.core.utils import atomic_write_json
-from scribe_web.core.voice_attach import record_and_attach_to_last_step
-from scribe_web.core.transcribe_runtime import transcribe_pl_optional
-from scribe_web.core.voice_runtime import VoiceState, start_recording, stop_and_save_wav
-from scribe_web.ui.annotator import annotate_freehand_blocking
+from scribe_web.core.paths import ensure_dirs, logs_root, sessions_root
+from scribe_web.core.transcribe_queue import DONE, TranscriptionQueue
+from scribe_web.core.transcribe_runtime import transcribe_pl_optional, transcribe_segments
+from scribe_web.core.transcript_cache import CACHE
+from scribe_web.core.voice_runtime import (
+    VoiceState,
+    recording_position,
+    start_recording,
+    start_timed_recording,
+    stop_and_save_wav,
+    stop_timed_recording,
+)
+
+if TYPE_CHECKING:
+    from scribe_web.core.capture import ScreenGrabber
+    from scribe_web.core.delta_frames import DeltaReader, DeltaWriter
+    from scribe_web.core.transcribe_stream import StreamingTranscriber
+
+# Ciężkie zależności (mss, PIL, numpy, ImageTk) ładujemy przy pierwszym użyciu,
+# żeby panel pojawił się bez czekania na nie; preload_modules() dociąga je w tle.
+HEAVY_MODULES = (
+    "scribe_web.core.capture",
+    "scribe_web.core.encoders",
+    "scribe_web.core.phash",
+    "scribe_web.core.delta_frames",
+    "scribe_web.core.vad",
+    "scribe_web.ui.annotator",
+)
+
+
+def preload_modules(logger: logging.Logger | None = None) -> None:
+    import importlib
+
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as exc:
+            if logger is not None:
+                logger.info("PRELOAD skipped: %s error=%s", name, exc)
+
+
+def _locked(method):
+    # Hotkey (osobny wątek) i panel (wątek Tk) dzielą stan sesji.
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _done_future() -> Future:
+    future: Future = Future()
+    future.set_result(None)
+    return future
+
+
+def _encode_step_screenshot(
+    screenshot,
+    out_path: Path,
+    profile: dict,
+    ai_copy_path: Path | None,
+    ai_profile: dict | None,
+    blob_root: Path | None,
+) -> None:
+    from scribe_web.core.capture import encode_screenshot
+
+    encode_screenshot(screenshot, out_path, profile, ai_copy_path, ai_profile)
+    if blob_root is None:
+        return
+    store_file(blob_root, out_path)
+    if ai_copy_path is not None:
+        store_file(blob_root, ai_copy_path)
+
+
+def _write_delta_frame(
+    writer: DeltaWriter,
+    step_id: int,
+    screenshot,
+    ai_copy_path: Path | None,
+    ai_profile: dict | None,
+    blob_root: Path | None,
+) -> dict:
+    from scribe_web.core.capture import screenshot_to_image
+    from scribe_web.core.encoders import save_image
+
+    image = screenshot_to_image(screenshot)
+    meta = writer.write(step_id, image)
+    if ai_copy_path is not None and ai_profile is not None:
+        save_image(image, ai_copy_path, ai_profile)
+        if blob_root is not None:
+            store_file(blob_root, ai_copy_path)
+    return meta
+
+
+def _store_recording(wav: Path, storage_format: str, blob_root: Path | None) -> Path:
+    from scribe_web.core.audio_post import STORAGE_FORMATS, compress_audio
+
+    stored = wav
+    if storage_format in STORAGE_FORMATS and wav.exists():
+        stored = compress_audio(wav, storage_format)
+    if blob_root is not None and stored.exists():
+        store_file(blob_root, stored)
+    return stored
+
+
+def _no_segments(_wav: Path) -> list[dict]:
+    return []
 
 
 class Controller:
@@ -26,20 +145,191 @@ class Controller:
         self.project_name: str | None = None
         self.last_action: str | None = None
         self.voice_state = VoiceState()
+        self.transcriptions: TranscriptionQueue | None = None
+        self.voice_stream: StreamingTranscriber | None = None
+        # voice.session_track: jedno nagranie od S do Z zamiast nagrań per krok.
+        self.session_track: VoiceState | None = None
+        # ASR zakończonych ścieżek sesji; przeżywa Z, zamyka ją dopiero close().
+        self.track_jobs: TranscriptionQueue | None = None
+        # Zamiast input(): wołane w wątku UI po transkrypcji (step_id, raw); nie może blokować.
+        self.transcript_hook: Callable[[int, str], None] | None = None
+        self.capture_worker: CaptureWorker | None = None
+        self.grabber: ScreenGrabber | None = None
+        self.delta_writer: DeltaWriter | None = None
+        self.delta_reader: DeltaReader | None = None
+        self.capture_mode = config.get("capture", {}).get("mode", "full")
+        if self.capture_mode not in CAPTURE_MODES:
+            self.capture_mode = "full"
+        self.pending_captures: dict[int, Future] = {}
+        # Krok otwarty w edytorze E (blokada jest wtedy zwolniona); K-duplikat nie może
+        # wskazać jego zrzutu, bo zapis adnotacji go zastąpi.
+        self._annotating: dict | None = None
+        self.lock = threading.RLock()
         logs_dir = logs_root(config)
         ensure_dirs([logs_dir])
         self.logger = setup_logging(logs_dir / "scribe_web.log")
 
+    def _blob_root(self) -> Path | None:
+        if not self.config.get("blobs", {}).get("enabled", True):
+            return None
+        return blobs_root(self.config)
+
+    def _store_blob(self, path: Path) -> None:
+        root = self._blob_root()
+        if root is not None and path.exists():
+            store_file(root, path)
+
+    def _voice_vad(self) -> dict | None:
+        if not self.config.get("voice", {}).get("trim_silence", False):
+            return None
+        from scribe_web.core.vad import vad_settings
+
+        return vad_settings(self.config)
+
+    def _maybe_compact(self) -> None:
+        interval_s = float(self.config.get("journal", {}).get("compact_interval_s", 60))
+        if self.ctx is not None and maybe_compact(self.ctx, interval_s):
+            self.logger.info("COMPACT payload: steps=%s", len(self.ctx.payload["steps"]))
+
+    @_locked
+    def compact(self) -> bool:
+        if self.ctx is None:
+            return False
+        compact_session(self.ctx)
+        self.logger.info("COMPACT payload: steps=%s", len(self.ctx.payload["steps"]))
+        return True
+
+    @_locked
+    def poll_background(self) -> None:
+        if self.track_jobs is not None:
+            for job in self.track_jobs.drain_completed():
+                self._apply_session_track(job)
+        if self.transcriptions is None:
+            return
+        for job in self.transcriptions.drain_completed():
+            self._apply_transcription(job)
+
+    def _apply_transcription(self, job) -> None:
+        if self.ctx is None:
+            return
+        step = next(
+            (item for item in self.ctx.payload.get("steps", []) if item.get("id") == job.step_id),
+            None,
+        )
+        if step is not None and (job.state == DONE or job.audio_path is not None):
+            if job.audio_path is not None:
+                step.setdefault("assets", {})["voice"] = f"transcripts/{job.audio_path.name}"
+            if job.state == DONE:
+                step_text = step.setdefault("text", {})
+                step_text["voice_transcript_raw"] = f"transcripts/step_{job.step_id:03d}_raw.txt"
+                step_text["voice_transcript_clean"] = (
+                    f"transcripts/step_{job.step_id:03d}_clean.txt"
+                )
+            update_step(self.ctx, step, "voice")
+            self._maybe_compact()
+            if job.state == DONE and self.transcript_hook is not None:
+                self.transcript_hook(job.step_id, job.raw_text)
+        self.logger.info(
+            "VOICE transcribed: step=%s state=%s transcribed=%s audio=%s",
+            job.step_id,
+            job.state,
+            bool(job.raw_text or job.clean_text),
+            job.audio_path.name if job.audio_path is not None else None,
+        )
+
+    def _flush_transcriptions(self) -> None:
+        if self.transcriptions is None:
+            return
+        self.transcriptions.flush()
+        self.poll_background()
+        self.transcriptions.close()
+        self.transcriptions = None
+
+    @_locked
     def get_status(self) -> dict:
+        self.poll_background()
         return {
             "project_name": self.ctx.project_name if self.ctx else None,
             "steps": len(self.ctx.payload["steps"]) if self.ctx else 0,
             "paused": self.paused,
             "last_action": self.last_action,
+            "pending_captures": self.capture_worker.pending() if self.capture_worker else 0,
+            "capture_mode": self.capture_mode,
+            "transcriptions": self.transcriptions.states() if self.transcriptions else {},
+            "pending_transcriptions": self.transcriptions.pending() if self.transcriptions else 0,
+            "recording": self.voice_state.recording or self.session_track is not None,
+            "session_track": self.session_track is not None,
+            "pending_session_tracks": self.track_jobs.pending() if self.track_jobs else 0,
         }
 
+    @_locked
+    def set_capture_mode(self, mode: str) -> str:
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"Unknown capture mode: {mode}")
+        self.capture_mode = mode
+        self.logger.info("CAPTURE mode: %s", mode)
+        return mode
+
+    def _wait_capture(self, step_id: int) -> bool:
+        future = self.pending_captures.pop(step_id, None)
+        if future is None:
+            return True
+        try:
+            future.result()
+        except Exception:
+            return False
+        return True
+
+    def _flush_captures(self) -> None:
+        if self.grabber is not None:
+            self.grabber.close()
+            self.grabber = None
+        if self.capture_worker is None:
+            return
+        self.capture_worker.flush()
+        self.capture_worker.close()
+        self.capture_worker = None
+        self.pending_captures.clear()
+
+    def refresh_displays(self) -> None:
+        if self.grabber is not None:
+            self.grabber.refresh_monitors()
+            self.logger.info("CAPTURE monitors refreshed")
+
+    @_locked
     def start_session(self, project_name: str) -> Path:
+        from scribe_web.core.capture import ScreenGrabber
+        from scribe_web.core.delta_frames import DeltaReader, DeltaWriter
+
+        self._flush_captures()
+        if self.voice_state.stop_event is not None:
+            stop_timed_recording(self.voice_state)
+        self._flush_transcriptions()
+        self._finish_session_track()
         self.ctx = create_session(project_name, self.config)
+        self.capture_worker = CaptureWorker(
+            max_pending=int(self.config.get("capture", {}).get("max_pending", 4)),
+            logger=self.logger,
+        )
+        self.grabber = ScreenGrabber()
+        MODELS.configure(self.config)
+        CACHE.configure(self.config)
+        MODELS.warm_up_async()
+        capture_cfg = self.config.get("capture", {})
+        if capture_cfg.get("storage", "full") == "delta":
+            self.delta_writer = DeltaWriter(
+                self.ctx.session_dir,
+                keyframe_interval=int(capture_cfg.get("keyframe_interval", 10)),
+            )
+            self.delta_reader = DeltaReader(
+                self.ctx.session_dir,
+                cache_size=int(capture_cfg.get("reader_cache", 8)),
+            )
+        else:
+            self.delta_writer = None
+            self.delta_reader = None
+        if self.config.get("voice", {}).get("session_track", False):
+            self._start_session_track()
         self.next_step_id = 1
         self.paused = False
         self.project_name = project_name
@@ -47,91 +337,422 @@ class Controller:
         self.logger.info("START session: %s", project_name)
         return self.ctx.session_dir
 
-    def add_step_screenshot(self) -> None:
-        if self.ctx is None:
+    @_locked
+    def add_step_screenshot(self, screenshot=None) -> tuple[int, Future]:
+        if self.ctx is None or self.capture_worker is None or self.grabber is None:
             raise RuntimeError("Session has not been started yet")
+        from scribe_web.core.capture import rect_of
+        from scribe_web.core.delta_frames import frame_rel
+        from scribe_web.core.encoders import ai_copy_profile, extension_for, screenshot_profile
+        from scribe_web.core.phash import dhash_screenshot, similarity, to_hex
+
         step_id = self.next_step_id
-        rel = f"steps/step_{step_id:03d}.png"
+        profile = screenshot_profile(self.config)
+        ai_profile = ai_copy_profile(self.config)
+        rel = f"steps/step_{step_id:03d}{extension_for(profile)}"
         abs_path = self.ctx.session_dir / rel
-        capture_fullscreen_png(abs_path)
+        ai_rel = f"steps/step_{step_id:03d}_ai{extension_for(ai_profile)}" if ai_profile else ""
+        ai_abs = self.ctx.session_dir / ai_rel if ai_rel else None
+        if screenshot is None:
+            screenshot = self.grabber.grab(
+                self.capture_mode,
+                self.config.get("capture", {}).get("region"),
+            )
+        rect = rect_of(screenshot)
+        phash = dhash_screenshot(screenshot)
         step = build_step(step_id, url="", title="", note="")
-        step["assets"]["screenshot"] = rel
+        duplicate = self._find_duplicate(phash, rect)
+        if duplicate is not None:
+            prev, distance = duplicate
+            prev_assets = prev["assets"]
+            future = self.pending_captures.get(prev["id"]) or _done_future()
+            edit = self._annotating
+            editing = edit is not None and edit["step"] is prev
+            if editing:
+                # Czysty oryginał (_orig) istnieje, zanim edytor ruszy; zrzut i kopia AI
+                # zostaną nadpisane adnotacją.
+                rel = edit["orig_rel"]
+                step["assets"]["format"] = edit["profile"]["format"]
+            else:
+                rel = prev_assets.get("original") or prev_assets["screenshot"]
+                step["assets"]["format"] = prev_assets.get("format", "png")
+            step["assets"]["screenshot"] = rel
+            if prev_assets.get("frame"):
+                step["assets"]["frame"] = prev_assets["frame"]
+            if prev_assets.get("ai_copy") and not prev_assets.get("annotated") and not editing:
+                step["assets"]["ai_copy"] = prev_assets["ai_copy"]
+                step["assets"]["ai_copy_format"] = prev_assets.get("ai_copy_format", "")
+            step["dedup"] = {
+                "of": prev["id"],
+                "distance": distance,
+                "similarity": similarity(distance),
+            }
+        elif self.delta_writer is not None:
+            future = self.capture_worker.submit(
+                _write_delta_frame,
+                self.delta_writer,
+                step_id,
+                screenshot,
+                ai_abs,
+                ai_profile,
+                self._blob_root(),
+            )
+            rel = frame_rel(step_id)
+            step["assets"]["screenshot"] = ""
+            step["assets"]["frame"] = rel
+            step["assets"]["format"] = "delta"
+            if ai_rel:
+                step["assets"]["ai_copy"] = ai_rel
+                step["assets"]["ai_copy_format"] = ai_profile["format"]
+        else:
+            future = self.capture_worker.submit(
+                _encode_step_screenshot,
+                screenshot,
+                abs_path,
+                profile,
+                ai_abs,
+                ai_profile,
+                self._blob_root(),
+            )
+            step["assets"]["screenshot"] = rel
+            step["assets"]["format"] = profile["format"]
+            if ai_rel:
+                step["assets"]["ai_copy"] = ai_rel
+                step["assets"]["ai_copy_format"] = ai_profile["format"]
+        self.pending_captures = {
+            sid: f for sid, f in self.pending_captures.items() if not f.done()
+        }
+        self.pending_captures[step_id] = future
+        step["capture"] = {"mode": self.capture_mode, "rect": rect}
+        step["phash"] = to_hex(phash)
         step["privacy"]["paused"] = self.paused
+        if self.session_track is not None:
+            step["audio"] = {
+                "track": TRACK_REL,
+                "start": round(recording_position(self.session_track) or 0.0, 3),
+            }
         add_step(self.ctx, step)
+        self._maybe_compact()
         self.next_step_id += 1
         self.last_action = "K"
         self.logger.info(
-            "ADD step: %s screenshot=%s paused=%s",
+            "ADD step: %s screenshot=%s mode=%s dedup=%s paused=%s",
             step["id"],
             rel,
+            self.capture_mode,
+            step.get("dedup", {}).get("of"),
             self.paused,
         )
+        return step_id, future
+
+    def _find_duplicate(self, phash: int, rect: dict) -> tuple[dict, int] | None:
+        dedup = self.config.get("dedup", {})
+        if self.ctx is None or not dedup.get("enabled", True):
+            return None
+        steps = self.ctx.payload.get("steps", [])
+        if not steps:
+            return None
+        from scribe_web.core.phash import from_hex, hamming
+
+        prev = steps[-1]
+        prev_hash = prev.get("phash")
+        if not prev_hash or prev.get("capture", {}).get("rect") != rect:
+            return None
+        distance = hamming(phash, from_hex(prev_hash))
+        if distance > int(dedup.get("max_distance", 2)):
+            return None
+        return prev, distance
+
+    def _frame_reader(self) -> DeltaReader:
+        from scribe_web.core.delta_frames import DeltaReader
+
+        if self.delta_reader is None:
+            self.delta_reader = DeltaReader(self.ctx.session_dir)
+        return self.delta_reader
 
     def annotate_last_step(self) -> bool:
+        from scribe_web.ui.annotator import annotate_freehand_blocking
+
+        # Edytor kręci własną pętlą Tk przez całą edycję: blokada tylko na przygotowanie i zapis,
+        # żeby hotkeye, panel i poll_background nie czekały na zamknięcie okna.
+        with self.lock:
+            edit = self._prepare_annotation()
+            self._annotating = edit
+        if edit is None:
+            return False
+        ok = False
+        try:
+            ok = annotate_freehand_blocking(
+                edit["orig_abs"], edit["edit_abs"], profile=edit["profile"]
+            )
+        finally:
+            with self.lock:
+                self._annotating = None
+                committed = self._commit_annotation(edit, ok)
+        return committed
+
+    def _prepare_annotation(self) -> dict | None:
         if self.ctx is None:
             self.logger.info("ANNOTATE step: ok=False steps=0")
-            return False
+            return None
         steps = self.ctx.payload.get("steps", [])
         if not steps:
             self.logger.info("ANNOTATE step: ok=False steps=0")
-            return False
+            return None
         step = steps[-1]
         screenshot_rel = step.get("assets", {}).get("screenshot") or ""
-        if not screenshot_rel:
+        frame_asset = step.get("assets", {}).get("frame") or ""
+        if not screenshot_rel and not frame_asset:
             self.logger.info("ANNOTATE step: ok=False screenshot=missing")
+            return None
+        if not self._wait_capture(step["id"]):
+            self.logger.info("ANNOTATE step: ok=False screenshot=failed")
+            return None
+        from scribe_web.core.delta_frames import frame_step_id
+        from scribe_web.core.encoders import extension_for, save_image, screenshot_profile
+
+        profile = screenshot_profile(self.config)
+        if not screenshot_rel:
+            # Tryb delta: pełny obraz odtwarzamy z kafelków dopiero, gdy jest potrzebny.
+            suffix = extension_for(profile)
+            orig_rel = f"steps/step_{step['id']:03d}_orig{suffix}"
+            orig_abs = self.ctx.session_dir / orig_rel
+            if not orig_abs.exists():
+                image = self._frame_reader().image(frame_step_id(frame_asset))
+                save_image(image, orig_abs, profile)
+                self._store_blob(orig_abs)
+        else:
+            suffix = Path(screenshot_rel).suffix
+            profile["format"] = step["assets"].get("format", "png")
+            if screenshot_rel != f"steps/step_{step['id']:03d}{suffix}":
+                # Krok-duplikat wskazuje na cudzy plik: nie nadpisujemy go, czytamy jako oryginał.
+                orig_rel = screenshot_rel
+            else:
+                orig_rel = f"steps/step_{step['id']:03d}_orig{suffix}"
+                orig_abs = self.ctx.session_dir / orig_rel
+                if not orig_abs.exists():
+                    link_copy(self.ctx.session_dir / screenshot_rel, orig_abs)
+        screenshot_rel = f"steps/step_{step['id']:03d}{suffix}"
+        # Edytor pisze obok; na miejsce zrzutu plik trafia dopiero przy zapisie kroku,
+        # gdy wiadomo, że krok nie został w międzyczasie cofnięty.
+        return {
+            "ctx": self.ctx,
+            "step": step,
+            "profile": profile,
+            "orig_rel": orig_rel,
+            "orig_abs": self.ctx.session_dir / orig_rel,
+            "screenshot_rel": screenshot_rel,
+            "edit_abs": self.ctx.session_dir / f"steps/.step_{step['id']:03d}_edit{suffix}",
+        }
+
+    def _commit_annotation(self, edit: dict, ok: bool) -> bool:
+        from PIL import Image
+
+        from scribe_web.core.encoders import ai_copy_profile, extension_for, save_image
+
+        step = edit["step"]
+        edit_abs = edit["edit_abs"]
+        # W trakcie edycji krok mógł zostać cofnięty (U) albo sesja zamknięta (Z).
+        undone = self.ctx is not edit["ctx"] or not any(
+            item is step for item in self.ctx.payload.get("steps", [])
+        )
+        if not ok or undone or not edit_abs.exists():
+            edit_abs.unlink(missing_ok=True)
+            self.logger.info("ANNOTATE step: ok=False step=%s undone=%s", step["id"], undone)
             return False
+        screenshot_rel = edit["screenshot_rel"]
         screenshot_abs = self.ctx.session_dir / screenshot_rel
-        orig_rel = f"steps/step_{step['id']:03d}_orig.png"
-        orig_abs = self.ctx.session_dir / orig_rel
-        if not orig_abs.exists():
-            shutil.copy2(screenshot_abs, orig_abs)
-        ok = annotate_freehand_blocking(orig_abs, screenshot_abs)
-        if ok:
-            step["assets"]["annotated"] = screenshot_rel
-            atomic_write_json(self.ctx.payload_path, self.ctx.payload)
-            self.last_action = "E"
-            self.logger.info(
-                "ANNOTATE step: ok=True step=%s output=%s",
-                step["id"],
-                screenshot_rel,
-            )
-        else:
-            self.logger.info("ANNOTATE step: ok=False step=%s", step["id"])
-        return ok
+        edit_abs.replace(screenshot_abs)
+        step["assets"]["screenshot"] = screenshot_rel
+        step["assets"]["format"] = edit["profile"]["format"]
+        step["assets"]["annotated"] = screenshot_rel
+        step["assets"]["original"] = edit["orig_rel"]
+        ai_rel = step["assets"].get("ai_copy") or ""
+        ai_profile = ai_copy_profile(self.config)
+        if ai_rel and ai_profile:
+            ai_profile["format"] = step["assets"].get("ai_copy_format", ai_profile["format"])
+            ai_rel = f"steps/step_{step['id']:03d}_ai{extension_for(ai_profile)}"
+            step["assets"]["ai_copy"] = ai_rel
+            with Image.open(screenshot_abs) as annotated:
+                save_image(annotated.convert("RGB"), self.ctx.session_dir / ai_rel, ai_profile)
+            self._store_blob(self.ctx.session_dir / ai_rel)
+        self._store_blob(screenshot_abs)
+        update_step(self.ctx, step, "annotate")
+        self._maybe_compact()
+        self.last_action = "E"
+        self.logger.info(
+            "ANNOTATE step: ok=True step=%s output=%s",
+            step["id"],
+            screenshot_rel,
+        )
+        return True
 
+    @_locked
     def toggle_pause(self) -> bool:
         self.paused = not self.paused
         self.last_action = "||"
         self.logger.info("PAUSE toggled: %s", self.paused)
         return self.paused
 
+    @_locked
     def undo_last_step(self) -> bool:
         if self.ctx is None:
             self.logger.info("UNDO step: ok=False steps=0")
             return False
-        steps = self.ctx.payload["steps"]
-        if not steps:
+        undone = undo_step(self.ctx)
+        if undone is None:
             self.logger.info("UNDO step: ok=False steps=0")
             return False
-        steps.pop()
-        atomic_write_json(self.ctx.payload_path, self.ctx.payload)
+        if self.delta_writer is not None and self.capture_worker is not None:
+            # Następny K nadpisze plik cofniętego kroku, więc nie może być bazą delty.
+            self.capture_worker.submit(self.delta_writer.reset)
+        if self.delta_reader is not None:
+            self.delta_reader.forget(undone["id"])
+        # Następny K dostanie to samo id; E nie może wziąć starego oryginału jako "już gotowego".
+        for orig in (self.ctx.session_dir / "steps").glob(f"step_{undone['id']:03d}_orig.*"):
+            orig.unlink(missing_ok=True)
+        self._maybe_compact()
+        steps = self.ctx.payload["steps"]
         self.next_step_id = len(steps) + 1
         self.last_action = "↩"
         self.logger.info("UNDO step: ok=True steps=%s", len(steps))
         return True
 
+    @_locked
     def record_voice_last_step(self, seconds: int = 20) -> dict:
+        """Nagranie o stałej długości w tle; G kończy je wcześniej."""
         if self.ctx is None:
             raise RuntimeError("Session has not been started yet")
-        result = record_and_attach_to_last_step(self.ctx, seconds=seconds)
+        steps = self.ctx.payload.get("steps", [])
+        if not steps:
+            raise RuntimeError("Brak kroku. Najpierw zrób K.")
+        if self.session_track is not None:
+            # Głos trafia już na ścieżkę sesji; przypisze go znacznik czasu kroku.
+            return {"recording": True, "step_id": steps[-1]["id"], "session_track": True}
+        if self.voice_state.recording:
+            self.toggle_voice_last_step()
+
+        step_id = steps[-1]["id"]
+        wav_abs = self.ctx.session_dir / f"transcripts/step_{step_id:03d}.wav"
+        detach(wav_abs)
+        self._prepare_voice(step_id, streaming=False)
+        if self.transcriptions is None:
+            self.transcriptions = TranscriptionQueue(transcribe_pl_optional, logger=self.logger)
+        start_timed_recording(
+            self.voice_state,
+            wav_abs,
+            seconds,
+            on_complete=partial(self._queue_transcription, step_id),
+        )
         self.last_action = "G"
+        self.logger.info("VOICE start: step=%s seconds=%s", step_id, seconds)
+        return {"recording": True, "step_id": step_id, "seconds": seconds}
+
+    def _start_session_track(self) -> None:
+        voice_cfg = self.config.get("voice", {})
+        # Bez kopii próbek w pamięci: godzina to ~115 MB int16, a ASR i tak czyta plik na końcu.
+        state = VoiceState(ring_seconds=float(voice_cfg.get("ring_seconds", 10.0)), keep_pcm=False)
+        try:
+            start_recording(state, self.ctx.session_dir / TRACK_REL)
+        except Exception as exc:
+            self.logger.error("VOICE session track failed: %s", exc)
+            return
+        self.session_track = state
+        self.logger.info("VOICE session track: start=%s", TRACK_REL)
+
+    def _finish_session_track(self) -> None:
+        """Kończy nagranie od razu; ASR całej ścieżki idzie w tle, wynik nakłada poll_background."""
+        state, self.session_track = self.session_track, None
+        if state is None:
+            return
+        writer = state.writer
+        track = self.ctx.session_dir / TRACK_REL
+        stop_and_save_wav(state, track)
+        # Dopiero po zamknięciu writer opróżnił bufor pierścieniowy: tyle próbek ma plik.
+        duration = writer.written / state.samplerate if writer is not None else 0.0
+        if self.track_jobs is None:
+            self.track_jobs = TranscriptionQueue(transcribe_pl_optional, logger=self.logger)
+        transcribe = _no_segments
+        if MODELS.available():
+            transcribe = partial(transcribe_segments, vad=self._voice_vad())
+        self.track_jobs.submit_segments(
+            track,
+            transcribe,
+            store=partial(
+                _store_recording,
+                storage_format=self.config.get("voice", {}).get("storage_format", "wav"),
+                blob_root=self._blob_root(),
+            ),
+            context=(self.ctx, duration),
+        )
+        self.logger.info("VOICE session track: stop duration_s=%.1f queued=True", duration)
+
+    def _apply_session_track(self, job) -> None:
+        ctx, duration = job.context
+        track = job.audio_path or job.wav_path
+        summary = apply_session_track(ctx, track, job.segments, duration)
+        # Sesja jest już zamknięta (Z albo nowe S), więc payload i katalog domykamy tutaj.
+        compact_session(ctx)
+        CATALOG.index_session(ctx.session_dir)
         self.logger.info(
-            "VOICE step: step=%s wav=%s",
-            self.ctx.payload["steps"][-1]["id"],
-            result["wav"],
+            "VOICE session track: duration_s=%.1f state=%s segments=%s steps=%s transcribed=%s",
+            duration,
+            job.state,
+            summary["segments"],
+            summary["steps"],
+            summary["transcribed"],
         )
-        return result
 
+    def _prepare_voice(self, step_id: int, streaming: bool) -> None:
+        self.voice_state.step_id = step_id
+        voice_cfg = self.config.get("voice", {})
+        self.voice_state.ring_seconds = float(voice_cfg.get("ring_seconds", 10.0))
+        self.voice_state.max_pcm_seconds = float(voice_cfg.get("max_pcm_seconds", 120.0))
+        self.voice_state.on_audio = None
+        self.voice_stream = None
+        if streaming and voice_cfg.get("streaming", False) and MODELS.available():
+            from scribe_web.core.transcribe_stream import StreamingTranscriber
+            from scribe_web.core.vad import vad_settings
+
+            self.voice_stream = StreamingTranscriber(
+                self.ctx.session_dir / f"transcripts/step_{step_id:03d}_raw.txt",
+                self.voice_state.samplerate,
+                MODELS.transcribe,
+                vad=vad_settings(self.config),
+                logger=self.logger,
+            )
+            self.voice_state.on_audio = self.voice_stream.feed
+
+    def _queue_transcription(
+        self,
+        step_id: int,
+        wav_abs: Path,
+        pcm=None,
+        stream: StreamingTranscriber | None = None,
+    ) -> None:
+        # Wołane też z wątku nagrania: kolejka już istnieje, ctx zmienia dopiero poll_background.
+        if stream is not None:
+            # Większość wypowiedzi jest już przetworzona; zostaje tylko ostatnia.
+            def transcribe(_wav: Path) -> tuple[str, str]:
+                text = stream.finish()
+                return text, text
+        else:
+            # Próbki z pamięci idą prosto do ASR; WAV zapisał już wątek rekordera.
+            transcribe = partial(transcribe_pl_optional, vad=self._voice_vad(), pcm=pcm)
+        self.transcriptions.submit(
+            step_id,
+            wav_abs,
+            wav_abs.with_name(f"step_{step_id:03d}_raw.txt"),
+            wav_abs.with_name(f"step_{step_id:03d}_clean.txt"),
+            transcribe,
+            store=partial(
+                _store_recording,
+                storage_format=self.config.get("voice", {}).get("storage_format", "wav"),
+                blob_root=self._blob_root(),
+            ),
+        )
+
+    @_locked
     def toggle_voice_last_step(self) -> dict:
         if self.ctx is None:
             raise RuntimeError("Brak kroku. Najpierw zrób K.")
@@ -139,58 +760,69 @@ class Controller:
         if not steps:
             raise RuntimeError("Brak kroku. Najpierw zrób K.")
 
+        if self.session_track is not None:
+            raise RuntimeError("Nagrywa się cała sesja; głos trafi do kroków po Z.")
+
         step_id = steps[-1]["id"]
         if not self.voice_state.recording:
-            self.voice_state.step_id = step_id
-            start_recording(self.voice_state)
+            self._prepare_voice(step_id, streaming=True)
+            start_recording(
+                self.voice_state,
+                self.ctx.session_dir / f"transcripts/step_{step_id:03d}.wav",
+            )
             self.last_action = "G"
-            self.logger.info("VOICE start: step=%s", step_id)
+            self.logger.info(
+                "VOICE start: step=%s streaming=%s",
+                step_id,
+                self.voice_stream is not None,
+            )
             return {"recording": True, "step_id": step_id}
 
-        target_step_id = self.voice_state.step_id or step_id
-        step = next(
-            (item for item in steps if item.get("id") == target_step_id),
-            None,
-        )
-        if step is None:
-            raise RuntimeError("Brak kroku. Najpierw zrób K.")
+        from scribe_web.core.audio_post import stored_audio_path
 
+        target_step_id = self.voice_state.step_id or step_id
         wav_rel = f"transcripts/step_{target_step_id:03d}.wav"
+        storage_format = self.config.get("voice", {}).get("storage_format", "wav")
+        audio_rel = f"transcripts/{stored_audio_path(Path(wav_rel), storage_format).name}"
         raw_rel = f"transcripts/step_{target_step_id:03d}_raw.txt"
         clean_rel = f"transcripts/step_{target_step_id:03d}_clean.txt"
 
-        out_wav_abs = self.ctx.session_dir / wav_rel
-        stop_and_save_wav(self.voice_state, out_wav_abs)
-
-        raw_text, clean_text = transcribe_pl_optional(out_wav_abs)
-        raw_abs = self.ctx.session_dir / raw_rel
-        raw_abs.parent.mkdir(parents=True, exist_ok=True)
-        raw_abs.write_text(raw_text, encoding="utf-8")
-
-        clean_abs = self.ctx.session_dir / clean_rel
-        clean_abs.parent.mkdir(parents=True, exist_ok=True)
-        clean_abs.write_text(clean_text, encoding="utf-8")
-
-        step_text = step.setdefault("text", {})
-        step_text["voice_transcript_raw"] = raw_rel
-        step_text["voice_transcript_clean"] = clean_rel
-        atomic_write_json(self.ctx.payload_path, self.ctx.payload)
+        if self.voice_state.stop_event is not None:
+            # Nagranie z K: wątek nagrania sam zapisze WAV i zleci transkrypcję.
+            stop_timed_recording(self.voice_state)
+        else:
+            step = next(
+                (item for item in steps if item.get("id") == target_step_id),
+                None,
+            )
+            if step is None:
+                raise RuntimeError("Brak kroku. Najpierw zrób K.")
+            out_wav_abs = self.ctx.session_dir / wav_rel
+            detach(out_wav_abs)
+            pcm = stop_and_save_wav(self.voice_state, out_wav_abs)
+            stream = self.voice_stream
+            self.voice_stream = None
+            self.voice_state.on_audio = None
+            if self.transcriptions is None:
+                self.transcriptions = TranscriptionQueue(
+                    transcribe_pl_optional, logger=self.logger
+                )
+            self._queue_transcription(target_step_id, out_wav_abs, pcm, stream=stream)
 
         self.voice_state.step_id = None
         self.last_action = "G"
         self.logger.info(
-            "VOICE stop: step=%s wav=%s transcribed=%s",
+            "VOICE stop: step=%s audio=%s queued=True",
             target_step_id,
-            wav_rel,
-            bool(raw_text or clean_text),
+            audio_rel,
         )
         return {
             "recording": False,
             "step_id": target_step_id,
-            "wav": wav_rel,
+            "audio": audio_rel,
             "raw": raw_rel,
             "clean": clean_rel,
-            "transcribed": bool(raw_text or clean_text),
+            "queued": True,
         }
 
     def add_step_screenshot_and_edit_and_voice(self, seconds: int = 20) -> bool:
@@ -201,44 +833,52 @@ class Controller:
         self.record_voice_last_step(seconds=seconds)
         return True
 
+    @_locked
     def end_session(self) -> Path | None:
         if self.ctx is None:
             return None
+        self._flush_captures()
+        if self.voice_state.stop_event is not None:
+            stop_timed_recording(self.voice_state)
+        self._flush_transcriptions()
+        self._finish_session_track()
+        compact_session(self.ctx)
+        if CACHE.enabled():
+            self.logger.info("TRANSCRIPT_CACHE stats: %s", CACHE.stats())
         session_dir = self.ctx.session_dir
+        CATALOG.index_session(session_dir)
         self.ctx = None
         self.project_name = None
         self.paused = False
         self.last_action = None
         return session_dir
 
+    def close(self) -> None:
+        """Przy wyjściu: czeka na transkrypcję ścieżek sesji, która jeszcze trwa w tle."""
+        if self.track_jobs is None:
+            return
+        self.track_jobs.flush()
+        self.poll_background()
+        self.track_jobs.close()
+        self.track_jobs = None
+
     def clean_empty_sessions(self) -> dict:
         """
         Przenosi puste sesje (steps==[]) do sessions/_trash.
         Zwraca podsumowanie: {"moved": int, "trash_dir": str}
         """
-        sessions_root = Path(self.config.get("sessions_root", "sessions"))
-        trash_dir = sessions_root / "_trash"
+        root = sessions_root(self.config)
+        trash_dir = root / "_trash"
         trash_dir.mkdir(parents=True, exist_ok=True)
 
+        # Katalog odświeża tylko sesje ze zmienionym mtime; puste znajduje jednym zapytaniem.
+        CATALOG.refresh(root)
         moved = 0
-        for p in sessions_root.iterdir():
+        for row in CATALOG.list_sessions(root, empty=True):
+            name = row["name"]
+            p = root / name
             if not p.is_dir():
                 continue
-            name = p.name
-            if name in ("_trash", "_smoke_test"):
-                continue
-            payload = p / "ai_payload.json"
-            if not payload.exists():
-                continue
-            try:
-                data = json.loads(payload.read_text(encoding="utf-8"))
-            except Exception:
-                continue
-            steps = data.get("steps", None)
-            if steps is None:
-                continue
-            if len(steps) != 0:
-                continue
 
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             dest = trash_dir / f"{name}__{ts}"
@@ -247,8 +887,17 @@ class Controller:
                 dest = trash_dir / f"{name}__{ts}_{i}"
                 i += 1
             p.rename(dest)
+            CATALOG.remove(root, name)
             moved += 1
 
+        gc = collect_garbage(blobs_root(self.config))
+
         self.last_action = "C"
-        self.logger.info("CLEAN moved=%s trash=%s", moved, trash_dir)
-        return {"moved": moved, "trash_dir": str(trash_dir)}
+        self.logger.info(
+            "CLEAN moved=%s trash=%s blobs_removed=%s freed_bytes=%s",
+            moved,
+            trash_dir,
+            gc["removed"],
+            gc["freed_bytes"],
+        )
+        return {"moved": moved, "trash_dir": str(trash_dir), "blobs_removed": gc["removed"]}
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from scribe_web.core.daemon_client import (
+    COMMANDS,
+    TOKEN_HEADER,
+    DaemonError,
+    call,
+    read_state,
+    state_path,
+)
+
+if TYPE_CHECKING:
+    from scribe_web.ui.controller import Controller
+
+DEFAULT_DAEMON = {
+    "host": "127.0.0.1",
+    "port": 0,
+    "pump_ms": 15,
+}
+
+
+def daemon_settings(config: dict) -> dict:
+    settings = dict(DEFAULT_DAEMON)
+    settings.update(config.get("daemon", {}))
+    return settings
+
+
+class CommandPump:
+    """Komendy z wątków HTTP trafiają do kolejki; wykonuje je wątek właściciela kontrolera."""
+
+    def __init__(self, controller: Controller, logger: logging.Logger) -> None:
+        self.controller = controller
+        self.logger = logger
+        self.stopped = threading.Event()
+        self.on_command = None
+        self._queue: queue.Queue = queue.Queue()
+        self._busy = False
+
+    def submit(self, command: str, params: dict) -> Future:
+        future: Future = Future()
+        if self.stopped.is_set():
+            future.set_exception(DaemonError("Demon się zamyka"))
+        else:
+            self._queue.put((command, params, future))
+        return future
+
+    def pump(self, timeout: float = 0.0) -> None:
+        # Adnotacja kręci zagnieżdżoną pętlę Tk; kolejne komendy czekają, aż się skończy.
+        if self._busy:
+            return
+        self._busy = True
+        try:
+            self._pump(timeout)
+        finally:
+            self._busy = False
+
+    def _pump(self, timeout: float) -> None:
+        while True:
+            try:
+                command, params, future = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return
+            timeout = 0.0
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = self._run(command, params)
+            except Exception as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+                if self.on_command is not None:
+                    self.on_command(command, result)
+
+    def _run(self, command: str, params: dict) -> Any:
+        ctrl = self.controller
+        self.logger.info("DAEMON command: %s", command)
+        if command == "start":
+            return {"session_dir": str(ctrl.start_session(params.get("project") or "nowa_sesja"))}
+        if command == "step":
+            step_id, _future = ctrl.add_step_screenshot()
+            return {"step_id": step_id}
+        if command == "annotate":
+            return {"ok": ctrl.annotate_last_step()}
+        if command == "voice":
+            return ctrl.toggle_voice_last_step()
+        if command == "pause":
+            return {"paused": ctrl.toggle_pause()}
+        if command == "undo":
+            return {"ok": ctrl.undo_last_step()}
+        if command == "end":
+            session_dir = ctrl.end_session()
+            return {"session_dir": str(session_dir) if session_dir else None}
+        if command == "status":
+            return ctrl.get_status()
+        if command == "quit":
+            self.stopped.set()
+            return {"stopping": True}
+        raise DaemonError(f"Nieznana komenda: {command}")
+
+
+def _handler(pump: CommandPump, token: str) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self._dispatch()
+
+        def do_POST(self) -> None:
+            self._dispatch()
+
+        def _dispatch(self) -> None:
+            if not secrets.compare_digest(self.headers.get(TOKEN_HEADER, ""), token):
+                self._reply(403, {"error": "Zły token"})
+                return
+            command = self.path.strip("/").split("?", 1)[0]
+            if command not in COMMANDS:
+                self._reply(404, {"error": f"Nieznana komenda: {command}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            except (ValueError, json.JSONDecodeError):
+                self._reply(400, {"error": "Niepoprawny JSON"})
+                return
+            try:
+                result = pump.submit(command, params).result()
+            except RuntimeError as exc:
+                self._reply(409, {"error": str(exc)})
+            except Exception as exc:
+                pump.logger.error("DAEMON command failed: %s error=%s", command, exc)
+                self._reply(500, {"error": str(exc)})
+            else:
+                self._reply(200, {"result": result})
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+class DaemonServer:
+    def __init__(self, config: dict, pump: CommandPump) -> None:
+        settings = daemon_settings(config)
+        self.config = config
+        self.pump = pump
+        self.token = secrets.token_urlsafe(24)
+        self.httpd = ThreadingHTTPServer(
+            (settings["host"], int(settings["port"])),
+            _handler(pump, self.token),
+        )
+        # server_close() czeka na obsługiwane żądania, żeby np. `quit` dostał odpowiedź.
+        self.httpd.daemon_threads = False
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever,
+            name="scribe-daemon-http",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        host, port = self.httpd.server_address[:2]
+        path = state_path(self.config)
+        _write_private_json(
+            path,
+            {"host": host, "port": port, "token": self.token, "pid": os.getpid()},
+        )
+        self._thread.start()
+        self.pump.logger.info("DAEMON listening: http://%s:%s", host, port)
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        state = read_state(self.config)
+        if state is not None and state.get("pid") == os.getpid():
+            state_path(self.config).unlink(missing_ok=True)
+        self.pump.logger.info("DAEMON stopped")
+
+
+def _write_private_json(path: Path, data: dict) -> None:
+    """Jak atomic_write_json, ale plik od początku ma 0600: token nie bywa czytelny dla innych."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f"{path.suffix}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_daemon(config: dict, panel: bool = True) -> None:
+    from scribe_web.core.asr_models import MODELS
+    from scribe_web.ui.controller import Controller, preload_modules
+
+    try:
+        call(config, "status", timeout=2.0)
+    except DaemonError:
+        pass
+    else:
+        raise DaemonError("Demon już działa")
+
+    ctrl = Controller(config)
+    pump = CommandPump(ctrl, ctrl.logger)
+    server = DaemonServer(config, pump)
+    # Demon trzyma model i moduły przechwytywania w pamięci od startu, nie od pierwszego S.
+    MODELS.configure(config)
+    MODELS.warm_up_async()
+    threading.Thread(
+        target=preload_modules,
+        args=(ctrl.logger,),
+        name="scribe-preload",
+        daemon=True,
+    ).start()
+    server.start()
+    try:
+        if panel:
+            from scribe_web.ui.panel import run_panel
+
+            run_panel(config, controller=ctrl, pump=pump)
+        else:
+            from scribe_web.ui.hotkeys import HotkeyCapture
+
+            hotkeys = HotkeyCapture(ctrl, config, ctrl.logger)
+            hotkeys.start()
+            try:
+                while not pump.stopped.is_set():
+                    pump.pump(timeout=0.5)
+                    ctrl.poll_background()
+                    hotkeys.drain_events()
+            finally:
+                hotkeys.stop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pump.stopped.set()
+        pump.pump()
+        server.close()
+        if ctrl.ctx is not None:
+            ctrl.end_session()
+        ctrl.close()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from scribe_web.ui.controller import Controller
+
+DEFAULT_HOTKEYS = {
+    "enabled": False,
+    "step": "<ctrl>+<alt>+k",
+}
+
+_STOP = object()
+
+
+def hotkey_settings(config: dict) -> dict:
+    settings = dict(DEFAULT_HOTKEYS)
+    settings.update(config.get("hotkeys", {}))
+    return settings
+
+
+class HotkeyCapture:
+    """Globalny skrót K: zrzut ekranu w wątku roboczym, do Tk idą tylko statusy (events)."""
+
+    def __init__(self, controller: Controller, config: dict, logger: logging.Logger) -> None:
+        self.controller = controller
+        self.settings = hotkey_settings(config)
+        self.logger = logger
+        self.events: queue.Queue = queue.Queue()
+        self._requests: queue.Queue = queue.Queue()
+        self._listener: Any = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> bool:
+        if not self.settings.get("enabled"):
+            return False
+        try:
+            from pynput import keyboard
+        except ModuleNotFoundError:
+            self.logger.info("HOTKEY disabled: pynput not installed")
+            return False
+        self._thread = threading.Thread(target=self._run, name="scribe-hotkey", daemon=True)
+        self._thread.start()
+        self._listener = keyboard.GlobalHotKeys({self.settings["step"]: self._on_step})
+        self._listener.start()
+        self.logger.info("HOTKEY listening: step=%s", self.settings["step"])
+        return True
+
+    def _on_step(self) -> None:
+        # Wątek pynput: nie blokujemy go, tylko zapisujemy moment naciśnięcia.
+        self._requests.put(time.perf_counter())
+
+    def _run(self) -> None:
+        from scribe_web.core.capture import ScreenGrabber
+
+        # mss trzyma uchwyty per wątek, więc ten wątek ma własny grabber.
+        grabber = ScreenGrabber()
+        try:
+            while True:
+                pressed = self._requests.get()
+                if pressed is _STOP:
+                    return
+                self._capture(grabber, pressed)
+        finally:
+            grabber.close()
+
+    def _capture(self, grabber: Any, pressed: float) -> None:
+        ctrl = self.controller
+        if ctrl.ctx is None:
+            self.events.put({"action": "K", "error": "Brak sesji. Najpierw S."})
+            return
+        try:
+            screenshot = grabber.grab(
+                ctrl.capture_mode,
+                ctrl.config.get("capture", {}).get("region"),
+            )
+            pixels_ms = (time.perf_counter() - pressed) * 1000
+            step_id, future = ctrl.add_step_screenshot(screenshot=screenshot)
+        except Exception as exc:
+            self.logger.error("HOTKEY step failed: %s", exc)
+            self.events.put({"action": "K", "error": str(exc)})
+            return
+        step_ms = (time.perf_counter() - pressed) * 1000
+        self.logger.info(
+            "HOTKEY step: step=%s key_to_pixels_ms=%.1f key_to_step_ms=%.1f",
+            step_id,
+            pixels_ms,
+            step_ms,
+        )
+        future.add_done_callback(lambda f: self._log_saved(step_id, pressed, f))
+        self.events.put(
+            {"action": "K", "step_id": step_id, "pixels_ms": pixels_ms, "step_ms": step_ms}
+        )
+
+    def _log_saved(self, step_id: int, pressed: float, future: Future) -> None:
+        if future.exception() is None:
+            self.logger.info(
+                "HOTKEY saved: step=%s key_to_disk_ms=%.1f",
+                step_id,
+                (time.perf_counter() - pressed) * 1000,
+            )
+
+    def drain_events(self) -> list[dict]:
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._thread is not None:
+            self._requests.put(_STOP)
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -1,7 +1,13 @@
+import os
+import threading
 import tkinter as tk
 from tkinter import messagebox
 
-from .controller import Controller
+from scribe_web.core.constants import CAPTURE_MODES
+from scribe_web.core.startup_profile import PROBE_ENV, report_painted
+
+from .controller import Controller, preload_modules
+from .hotkeys import HotkeyCapture
 
 
 PANEL_BG = "#2b2b2b"
@@ -11,6 +17,15 @@ BTN_PRESSED_BG = PANEL_BG
 
 ALPHA = 0.5
 FLASH_MS = 120
+POLL_MS = 500
+HOTKEY_POLL_MS = 30
+
+CAPTURE_MODE_LABELS = {
+    "full": "Monitor główny",
+    "all": "Wszystkie monitory",
+    "region": "Zapisany region",
+    "window": "Okno pod kursorem",
+}
 
 
 class CanvasButton(tk.Frame):
@@ -95,6 +110,7 @@ class PanelApp:
     def __init__(self, root: tk.Tk, controller: Controller):
         self.root = root
         self.controller = controller
+        self.persistent = False
 
         self.drag_off_x = 0
         self.drag_off_y = 0
@@ -154,12 +170,25 @@ class PanelApp:
 
         self._place_buttons()
 
+        self.capture_mode_var = tk.StringVar(value=self.controller.capture_mode)
+        self.capture_menu = tk.Menu(self.root, tearoff=0)
+        for mode in CAPTURE_MODES:
+            self.capture_menu.add_radiobutton(
+                label=CAPTURE_MODE_LABELS[mode],
+                value=mode,
+                variable=self.capture_mode_var,
+                command=self.on_capture_mode,
+            )
+        for seq in ("<Button-2>", "<Button-3>", "<Control-Button-1>"):
+            self.btnK.c.bind(seq, self._show_capture_menu)
+
         self.root.bind("<Escape>", lambda _e: self.root.destroy())
 
         self._set_controls_started(False)
 
         self.root.attributes("-alpha", ALPHA)
         self._refresh_status()
+        self.root.after(POLL_MS, self._poll)
 
     def _place_buttons(self):
         self.btnS.grid(row=0, column=0, padx=1, pady=1)
@@ -315,6 +344,11 @@ class PanelApp:
         action = st.get("last_action") or "—"
         line1 = f"SESJA: {name}   KROKI: {steps}"
         line2 = f"PAUZA: {paused}   AKCJA: {action}"
+        if st.get("recording"):
+            line2 += "   REC"
+        pending = st.get("pending_transcriptions", 0)
+        if pending:
+            line2 += f"   TRANS: {pending}"
         return line1, line2
 
     def _refresh_status(self):
@@ -327,6 +361,13 @@ class PanelApp:
             for lbl in (self.status_lbl_line1, self.status_lbl_line2):
                 lbl.configure(wraplength=wrap_w)
 
+    def _poll(self):
+        try:
+            self._refresh_status()
+        except tk.TclError:
+            return
+        self.root.after(POLL_MS, self._poll)
+
     def _start_move(self, event):
         self.drag_off_x = event.x
         self.drag_off_y = event.y
@@ -362,6 +403,17 @@ class PanelApp:
         self.controller.add_step_screenshot_and_edit_and_voice(seconds=20)
         self._refresh_status()
 
+    def _show_capture_menu(self, event):
+        try:
+            self.capture_menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            self.capture_menu.grab_release()
+        return "break"
+
+    def on_capture_mode(self):
+        self.controller.set_capture_mode(self.capture_mode_var.get())
+        self._refresh_status()
+
     def on_clean(self):
         confirm = self._ask_confirm_text(prompt="Wpisz CLEAN aby wyczyścić puste sesje:")
         if confirm is None:
@@ -394,10 +446,7 @@ class PanelApp:
         if result.get("recording"):
             messagebox.showinfo("SCRIBE", "REC ON (kliknij G aby stop)")
         else:
-            if result.get("transcribed"):
-                messagebox.showinfo("SCRIBE", "Zapisano transkrypcję")
-            else:
-                messagebox.showinfo("SCRIBE", "Zapisano audio, brak transkrypcji")
+            messagebox.showinfo("SCRIBE", "Zapisano audio, transkrypcja w tle")
 
     def on_probe(self):
         self.controller.last_action = "P"
@@ -416,6 +465,42 @@ class PanelApp:
         self.controller.undo_last_step()
         self._refresh_status()
 
+    def attach_pump(self, pump, interval_ms: int):
+        # Tryb demona: komendy z API wykonujemy w wątku Tk, Z nie zamyka panelu.
+        self.persistent = True
+        pump.on_command = self.on_remote
+
+        def tick():
+            if pump.stopped.is_set():
+                self.root.destroy()
+                return
+            pump.pump()
+            self.root.after(interval_ms, tick)
+
+        self.root.after(interval_ms, tick)
+
+    def attach_hotkeys(self, hotkeys: HotkeyCapture):
+        # Zrzut robi wątek skrótu; tu tylko odświeżamy status.
+        def tick():
+            for event in hotkeys.drain_events():
+                if event.get("error"):
+                    self.status_var_line2.set(f"SKRÓT: {event['error']}")
+                    continue
+                self.btnK.flash()
+                self._refresh_status()
+            self.root.after(HOTKEY_POLL_MS, tick)
+
+        self.root.after(HOTKEY_POLL_MS, tick)
+
+    def on_remote(self, command: str, result):
+        if command == "start":
+            self._set_controls_started(True)
+        elif command == "end":
+            self._set_controls_started(False)
+        elif command == "pause":
+            self.btnPause.set_pressed(result["paused"])
+        self._refresh_status()
+
     def on_end(self):
         self.root.after(10, self._end_after_flash)
 
@@ -423,14 +508,47 @@ class PanelApp:
         sd = self.controller.end_session()
         if sd:
             messagebox.showinfo("SCRIBE", f"Zapisano sesję:\n{sd}")
+        if self.persistent:
+            self._set_controls_started(False)
+            self._refresh_status()
+            return
         self.root.destroy()
 
 
-def run_panel(config: dict):
+def run_panel(config: dict, controller: Controller | None = None, pump=None):
     root = tk.Tk()
     root.title("SCRIBE")
-    ctrl = Controller(config)
-    PanelApp(root, ctrl)
+    ctrl = controller or Controller(config)
+    app = PanelApp(root, ctrl)
 
     root.geometry("+200+200")
-    root.mainloop()
+    if os.environ.get(PROBE_ENV):
+        root.after(0, _probe_painted, root)
+    elif pump is None:
+        # Po narysowaniu panelu dociągamy mss/PIL/numpy, żeby pierwsze K nie czekało.
+        root.after(
+            200,
+            lambda: threading.Thread(
+                target=preload_modules,
+                args=(ctrl.logger,),
+                name="scribe-preload",
+                daemon=True,
+            ).start(),
+        )
+    if pump is not None:
+        app.attach_pump(pump, int(config.get("daemon", {}).get("pump_ms", 15)))
+    hotkeys = HotkeyCapture(ctrl, config, ctrl.logger)
+    if hotkeys.start():
+        app.attach_hotkeys(hotkeys)
+    try:
+        root.mainloop()
+    finally:
+        hotkeys.stop()
+        if controller is None:
+            ctrl.close()
+
+
+def _probe_painted(root: tk.Tk) -> None:
+    root.update_idletasks()
+    report_painted()
+    root.destroy()
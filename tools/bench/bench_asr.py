@@ -0,0 +1,97 @@
+"""Benchmark backendów ASR: współczynnik czasu rzeczywistego (RTF) i szczytowe RSS.
+
+Każdy backend działa w osobnym procesie, żeby pomiar pamięci był rzetelny.
+Uruchom z katalogu repo, podając polskie nagrania WAV:
+
+    python3 tools/bench/bench_asr.py nagranie1.wav nagranie2.wav [--model base]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from scribe_web.core.asr_backends import BACKENDS  # noqa: E402
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ModuleNotFoundError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(backend_name: str, wavs: list[Path], settings: dict) -> dict:
+    import soundfile as sf
+
+    backend = BACKENDS[backend_name]
+    t0 = time.perf_counter()
+    model = backend.load(settings)
+    load_s = time.perf_counter() - t0
+
+    audio_s = 0.0
+    transcribe_s = 0.0
+    for wav in wavs:
+        audio_s += sf.info(str(wav)).duration
+        t0 = time.perf_counter()
+        backend.transcribe(model, wav, settings["language"], settings)
+        transcribe_s += time.perf_counter() - t0
+    return {
+        "backend": backend_name,
+        "load_s": round(load_s, 2),
+        "audio_s": round(audio_s, 2),
+        "transcribe_s": round(transcribe_s, 2),
+        "rtf": round(transcribe_s / audio_s, 3) if audio_s else None,
+        "peak_rss_mb": round(_peak_rss_mb() or 0, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SCRIBE ASR benchmark")
+    parser.add_argument("wavs", nargs="+", type=Path)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--vosk-model-path", default="")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    settings = {
+        "model": args.model,
+        "device": args.device,
+        "compute_type": args.compute_type,
+        "language": "pl",
+        "vosk_model_path": args.vosk_model_path,
+    }
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.wavs, settings)))
+        return
+
+    print(f"{'backend':>15} {'load s':>8} {'audio s':>8} {'asr s':>8} {'RTF':>7} {'RSS MB':>8}")
+    for name, backend in BACKENDS.items():
+        if not backend.available():
+            print(f"{name:>15} {'brak':>8}")
+            continue
+        cmd = [sys.executable, __file__, "--worker", name, *map(str, args.wavs)]
+        cmd += ["--model", args.model, "--device", args.device]
+        cmd += ["--compute-type", args.compute_type, "--vosk-model-path", args.vosk_model_path]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name:>15} błąd: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(
+            f"{name:>15} {r['load_s']:8.2f} {r['audio_s']:8.2f} {r['transcribe_s']:8.2f} "
+            f"{r['rtf'] or 0:7.3f} {r['peak_rss_mb']:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark enkoderów screenshotów: ms i bajty na klatkę.
+
+Uruchom z katalogu repo:
+
+    python3 tools/bench/bench_encoders.py [--image plik.png] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from scribe_web.core.encoders import format_available, resolve_profile, save_image  # noqa: E402
+
+RESOLUTIONS = [(1920, 1080), (2560, 1440), (3840, 2160), (5120, 2880)]
+
+PROFILES = {
+    "png-1": {"format": "png", "compress_level": 1, "optimize": False},
+    "png-6": {"format": "png", "compress_level": 6, "optimize": False},
+    "png-9-opt": {"format": "png", "compress_level": 9, "optimize": True},
+    "webp-lossless": {"format": "webp", "lossless": True, "method": 0},
+    "webp-q80": {"format": "webp", "lossless": False, "quality": 80, "method": 0},
+    "qoi": {"format": "qoi"},
+    "jpeg-q80": {"format": "jpeg", "quality": 80},
+}
+
+
+def synthetic_desktop(width: int, height: int, seed: int = 0) -> Image.Image:
+    rnd = random.Random(seed)
+    image = Image.new("RGB", (width, height), (236, 236, 236))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, width, 40], fill=(48, 48, 48))
+    for _ in range(width * height // 40000):
+        x = rnd.randrange(0, width - 200)
+        y = rnd.randrange(40, height - 40)
+        w = rnd.randrange(40, 400)
+        h = rnd.randrange(12, 200)
+        color = tuple(rnd.randrange(0, 256) for _ in range(3))
+        draw.rectangle([x, y, x + w, y + h], fill=color)
+    for y in range(60, height, 22):
+        x = rnd.randrange(20, 200)
+        draw.text((x, y), "Lorem ipsum faktura eksport " * rnd.randrange(1, 6), fill=(20, 20, 20))
+    return image
+
+
+def bench(image: Image.Image, profile: dict, repeat: int, tmp_dir: Path) -> tuple[float, int]:
+    out = tmp_dir / "frame"
+    best_ms = float("inf")
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = save_image(image, out, profile)
+        best_ms = min(best_ms, (time.perf_counter() - t0) * 1000)
+    return best_ms, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SCRIBE encoder benchmark")
+    parser.add_argument("--image", type=Path, help="Prawdziwy screenshot zamiast syntetycznego")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.image:
+        frames = [(args.image.name, Image.open(args.image).convert("RGB"))]
+    else:
+        frames = [(f"{w}x{h}", synthetic_desktop(w, h)) for w, h in RESOLUTIONS]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        print(f"{'frame':>12} {'profile':>14} {'ms':>9} {'KiB':>9}")
+        for label, image in frames:
+            for name, raw_profile in PROFILES.items():
+                if not format_available(raw_profile["format"]):
+                    print(f"{label:>12} {name:>14} {'n/a':>9} {'n/a':>9}")
+                    continue
+                ms, size = bench(image, resolve_profile(raw_profile), args.repeat, tmp_dir)
+                print(f"{label:>12} {name:>14} {ms:9.1f} {size / 1024:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
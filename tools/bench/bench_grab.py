@@ -0,0 +1,56 @@
+"""Benchmark grabu ekranu: zimny (nowe mss na każdy K) vs ciepły (ScreenGrabber).
+
+Uruchom z katalogu repo (potrzebny dostęp do ekranu):
+
+    python3 tools/bench/bench_grab.py [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from scribe_web.core.capture import ScreenGrabber, grab_primary  # noqa: E402
+
+
+def _timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:>6}: median={statistics.median(samples):7.2f} ms  "
+        f"min={min(samples):7.2f} ms  max={max(samples):7.2f} ms  n={len(samples)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SCRIBE grab benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cold = _timed(grab_primary, args.repeat)
+
+    grabber = ScreenGrabber()
+    grabber.open()
+    try:
+        grabber.grab()
+        warm = _timed(grabber.grab, args.repeat)
+    finally:
+        grabber.close()
+
+    _report("cold", cold)
+    _report("warm", warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark startu panelu na zimnym interpreterze (regresja czasu do pierwszego rysowania).
+
+Uruchom z katalogu repo; bez ekranu mierzy sam import `scribe_web.ui.panel`:
+
+    python3 tools/bench/bench_startup.py [--repeat 5] [--budget-ms 1000]
+
+Kod wyjścia 1, gdy mediana przekracza budżet albo przy starcie ładuje się mss/PIL/numpy.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from scribe_web.core.startup_profile import (  # noqa: E402
+    IMPORT_ARGS,
+    PANEL_ARGS,
+    STARTUP_BUDGET_MS,
+    run_probe,
+    top_imports,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SCRIBE startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--import-only", action="store_true", help="Skip the Tk window")
+    args = parser.parse_args()
+
+    mode = "import" if args.import_only else "panel"
+    samples = []
+    results = []
+    for _ in range(args.repeat):
+        result = run_probe(IMPORT_ARGS if mode == "import" else PANEL_ARGS)
+        if mode == "panel" and result["painted_ms"] is None:
+            print(f"panel: brak okna ({result['error'] or result['returncode']}), mierzę import")
+            mode = "import"
+            result = run_probe(IMPORT_ARGS)
+        results.append(result)
+        samples.append(result["painted_ms"] if mode == "panel" else result["wall_ms"])
+
+    median = statistics.median(samples)
+    print(
+        f"{mode:>6}: median={median:7.1f} ms  min={min(samples):7.1f} ms  "
+        f"max={max(samples):7.1f} ms  n={len(samples)}  budget={args.budget_ms:.0f} ms"
+    )
+    slowest = results[samples.index(max(samples))]
+    for entry in top_imports(slowest["imports"], 10):
+        print(f"  {entry['cumulative_us'] / 1000:8.1f} ms  {entry['name']}")
+
+    heavy = sorted({name for result in results for name in result["heavy"]})
+    if heavy:
+        print("REGRESJA: przy starcie ładują się " + ", ".join(heavy))
+    if median > args.budget_ms:
+        print("REGRESJA: start wolniejszy niż budżet")
+    if heavy or median > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
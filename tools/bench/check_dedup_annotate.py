@@ -0,0 +1,104 @@
+"""Regresja: K w trakcie E (ten sam ekran) nie może dostać zrzutu z adnotacją.
+
+Uruchom z katalogu repo (bez ekranu: zrzuty i edytor są podstawione):
+
+    python3 tools/bench/check_dedup_annotate.py
+
+Edytor rysuje znacznik i w tym czasie drugi wątek robi K z identyczną klatką
+(`dedup` włączony, `capture.storage = "full"`). Krok-duplikat musi pokazywać czysty
+zrzut i nie może wskazywać kopii AI kroku w edycji. Kod wyjścia 1 przy błędzie.
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from PIL import Image  # noqa: E402
+
+from scribe_web.ui.controller import Controller  # noqa: E402
+
+WIDTH, HEIGHT = 200, 120
+CLEAN = (255, 0, 0)
+MARKER = (0, 255, 0)
+
+
+class FakeShot:
+    """To, czego kontroler używa ze zrzutu mss: prostokąt i bufor BGRA."""
+
+    def __init__(self, bgr: tuple[int, int, int]) -> None:
+        self.left, self.top, self.width, self.height = 0, 0, WIDTH, HEIGHT
+        self.size = (WIDTH, HEIGHT)
+        self.raw = bytes([*bgr, 255]) * (WIDTH * HEIGHT)
+
+
+def _install_editor(ctrl: Controller, errors: list) -> None:
+    def annotate(input_png: Path, output_png: Path, profile: dict | None = None) -> bool:
+        # K z hotkeya przychodzi z innego wątku, gdy okno edytora jest otwarte.
+        worker = threading.Thread(
+            target=lambda: ctrl.add_step_screenshot(screenshot=FakeShot((0, 0, 255)))
+        )
+        worker.start()
+        worker.join(timeout=10)
+        if worker.is_alive():
+            errors.append("K zablokowane przez otwarty edytor")
+        with Image.open(input_png) as image:
+            marked = image.convert("RGB")
+        marked.putpixel((0, 0), MARKER)
+        marked.save(output_png)
+        return True
+
+    module = types.ModuleType("scribe_web.ui.annotator")
+    module.annotate_freehand_blocking = annotate
+    sys.modules["scribe_web.ui.annotator"] = module
+
+
+def check(root: Path) -> list:
+    config = {
+        "sessions_root": str(root / "sessions"),
+        "logs_root": str(root / "logs"),
+        "capture": {"storage": "full"},
+        "encoder": {"ai_copy": {"enabled": True}},
+        "blobs": {"enabled": False},
+        "dedup": {"enabled": True, "max_distance": 2},
+        "asr": {"warmup": False},
+        "transcript_cache": {"enabled": False},
+    }
+    errors: list = []
+    ctrl = Controller(config)
+    _install_editor(ctrl, errors)
+    session_dir = ctrl.start_session("dedup_annotate")
+    _step_id, future = ctrl.add_step_screenshot(screenshot=FakeShot((0, 0, 255)))
+    future.result()
+    if not ctrl.annotate_last_step():
+        errors.append("adnotacja kroku 1 nie zapisana")
+    steps = ctrl.ctx.payload["steps"]
+    ctrl.end_session()
+    if len(steps) != 2 or steps[1].get("dedup", {}).get("of") != 1:
+        return errors + [f"brak kroku-duplikatu: {[step.get('dedup') for step in steps]}"]
+    first, dup = steps[0]["assets"], steps[1]["assets"]
+    with Image.open(session_dir / first["screenshot"]) as image:
+        if image.convert("RGB").getpixel((0, 0)) != MARKER:
+            errors.append("krok 1 bez adnotacji")
+    with Image.open(session_dir / dup["screenshot"]) as image:
+        pixel = image.convert("RGB").getpixel((0, 0))
+    if pixel != CLEAN:
+        errors.append(f"duplikat pokazuje {pixel} ({dup['screenshot']})")
+    if dup.get("ai_copy") and dup["ai_copy"] == first.get("ai_copy"):
+        errors.append(f"duplikat wskazuje kopię AI kroku w edycji ({dup['ai_copy']})")
+    return errors
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        errors = check(Path(tmp))
+    print("OK" if not errors else "BŁĄD: " + "; ".join(errors))
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
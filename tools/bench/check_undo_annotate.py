@@ -0,0 +1,82 @@
+"""Regresja: K, E, cofnij, K, E musi adnotować nowy zrzut, a nie ten cofnięty.
+
+Uruchom z katalogu repo (bez ekranu: zrzuty i edytor są podstawione):
+
+    python3 tools/bench/check_undo_annotate.py
+
+Sprawdza oba tryby `capture.storage` (full i delta); kod wyjścia 1 przy błędzie.
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from PIL import Image  # noqa: E402
+
+from scribe_web.ui.controller import Controller  # noqa: E402
+
+WIDTH, HEIGHT = 200, 120
+
+
+class FakeShot:
+    """To, czego kontroler używa ze zrzutu mss: prostokąt i bufor BGRA."""
+
+    def __init__(self, bgr: tuple[int, int, int]) -> None:
+        self.left, self.top, self.width, self.height = 0, 0, WIDTH, HEIGHT
+        self.size = (WIDTH, HEIGHT)
+        self.raw = bytes([*bgr, 255]) * (WIDTH * HEIGHT)
+
+
+def _install_editor(seen: list) -> None:
+    def annotate(input_png: Path, output_png: Path, profile: dict | None = None) -> bool:
+        with Image.open(input_png) as image:
+            seen.append(image.convert("RGB").getpixel((0, 0)))
+            image.save(output_png)
+        return True
+
+    module = types.ModuleType("scribe_web.ui.annotator")
+    module.annotate_freehand_blocking = annotate
+    sys.modules["scribe_web.ui.annotator"] = module
+
+
+def check(storage: str, root: Path) -> list:
+    config = {
+        "sessions_root": str(root / "sessions"),
+        "logs_root": str(root / "logs"),
+        "capture": {"storage": storage, "keyframe_interval": 10},
+        "blobs": {"enabled": False},
+        "dedup": {"enabled": False},
+        "asr": {"warmup": False},
+        "transcript_cache": {"enabled": False},
+    }
+    seen: list = []
+    _install_editor(seen)
+    ctrl = Controller(config)
+    ctrl.start_session(f"undo_{storage}")
+    for bgr in ((0, 0, 255), (255, 0, 0)):
+        _step_id, future = ctrl.add_step_screenshot(screenshot=FakeShot(bgr))
+        future.result()
+        ctrl.annotate_last_step()
+        if bgr == (0, 0, 255):
+            ctrl.undo_last_step()
+    ctrl.end_session()
+    return seen
+
+
+def main() -> None:
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in ("full", "delta"):
+            seen = check(storage, Path(tmp) / storage)
+            ok = seen == [(255, 0, 0), (0, 0, 255)]
+            failed |= not ok
+            print(f"{storage:5s}: {'OK' if ok else 'BŁĄD'} (edytor dostał {seen})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()